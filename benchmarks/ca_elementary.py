@@ -0,0 +1,48 @@
+"""Cells per second of the elementary CA engines against the original per-cell loop.
+
+Run from the repo root: ``python -m benchmarks.ca_elementary``.
+"""
+
+import time
+
+import numpy as np
+
+from mcs import CA
+
+
+def rule184_loop(config):
+    size = len(config)
+    config_next = np.zeros(size)
+    neighborhoods = set([(1, 1, 1), (1, 0, 1), (1, 0, 0), (0, 1, 1)])
+    for x in range(size):
+        pattern = (config[(x - 1) % size], config[x], config[(x + 1) % size])
+        if pattern in neighborhoods:
+            config_next[x] = 1
+    return config_next
+
+
+def cells_per_second(F, config, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        config = F(config)
+    return config, steps / (time.perf_counter() - start)
+
+
+def main():
+    for size in [10**4, 10**5, 10**6]:
+        config = np.random.default_rng(0).integers(2, size=size).astype(float)
+        steps = 3 if size > 10**4 else 10
+        expected, loop = cells_per_second(rule184_loop, config, steps) if size <= 10**5 else (None, np.nan)
+        result, vectorized = cells_per_second(CA.elementary(184), config, steps)
+        words, packed = cells_per_second(CA.elementary_packed(184, size), CA.pack(config), steps)
+        if expected is not None:
+            assert np.array_equal(result, expected)
+        assert np.array_equal(CA.unpack(words, size), result)
+        print(
+            f"size={size:>8}  loop={loop * size:10.3g}  "
+            f"vectorized={vectorized * size:10.3g}  packed={packed * size:10.3g}  cells/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Steps per second of the Life-like engine against the convolution-based Game of Life.
+
+Run from the repo root: ``python -m benchmarks.ca_life``.
+"""
+
+import time
+
+import numpy as np
+
+from mcs import CA
+
+
+def steps_per_second(F, config, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        config = F(config)
+    return config, steps / (time.perf_counter() - start)
+
+
+def main():
+    for size in [256, 1024, 2048]:
+        config = np.random.default_rng(0).integers(2, size=(size, size)).astype(float)
+        steps = 10
+        expected, convolve = steps_per_second(CA.game_of_life, config, steps)
+        result, life_like = steps_per_second(CA.life_like("B3/S23"), config.astype(np.uint8), steps)
+        assert np.array_equal(result, expected)
+        print(
+            f"size={size:>4}x{size:<4}  convolve2d={convolve:8.2f}  life_like={life_like:8.2f}  steps/s  "
+            f"speedup={life_like / convolve:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Time to ``import mcs`` in a fresh interpreter, and a check that heavy dependencies stay unloaded.
+
+Run from the repo root: ``python -m benchmarks.import_time``. Exits with an error if matplotlib, networkx, scipy
+or numba are imported eagerly, or if the import takes longer than ``--budget`` seconds on top of NumPy.
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY = ["matplotlib", "networkx", "scipy", "numba", "concurrent.futures"]
+
+
+def import_seconds(statement, repeat):
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    runs = [
+        subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True) for _ in range(repeat)
+    ]
+    return min(float(run.stdout) for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="time the best of this many imports")
+    parser.add_argument("--budget", type=float, default=0.2, help="max seconds of importing mcs on top of NumPy")
+    args = parser.parse_args()
+    numpy = import_seconds("import numpy", args.repeat)
+    mcs = import_seconds("import mcs", args.repeat)
+    print(f"import numpy={numpy * 1e3:8.1f} ms  import mcs={mcs * 1e3:8.1f} ms  overhead={(mcs - numpy) * 1e3:8.1f} ms")
+    code = f"import sys, mcs; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+    if loaded:
+        sys.exit(f"imported eagerly: {', '.join(loaded)}")
+    if mcs - numpy > args.budget:
+        sys.exit(f"import mcs exceeds the budget of {args.budget * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Run time of a per-cell rule through :func:`mcs.kernel` against a Python loop over the cells.
+
+Run from the repo root: ``python -m benchmarks.jit``. Uses Numba if it is installed.
+"""
+
+import time
+
+import numpy as np
+
+from mcs import CA, kernel
+
+
+def rule184(w):
+    return (w[0] and not w[1]) or (w[1] and w[2])
+
+
+def python_loop(config):
+    padded = np.concatenate([config[-1:], config, config[:1]])
+    return np.array([rule184(padded[i:][:3]) for i in range(len(config))], dtype=config.dtype)
+
+
+def run_time(F, steps, size):
+    ca = CA(steps, size)
+    ca.initialize()
+    start = time.perf_counter()
+    ca.simulate(F=F)
+    return ca.s, time.perf_counter() - start
+
+
+def main():
+    steps, size = 200, 1000
+    expected, python = run_time(python_loop, steps, size)
+    for backend in ["numpy", "numba"]:
+        try:
+            F = kernel(rule184, backend=backend)
+        except AssertionError:
+            print(f"backend={backend}  not installed")
+            continue
+        run_time(F, 2, 8)
+        result, seconds = run_time(F, steps, size)
+        assert np.array_equal(result, expected)
+        print(f"backend={backend}  python={python:7.3f}s  kernel={seconds:7.3f}s  speedup={python / seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
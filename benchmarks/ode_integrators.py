@@ -0,0 +1,41 @@
+"""Accuracy against wall-clock of the ODE integration methods on the Lotka-Volterra equations.
+
+Run from the repo root: ``python -m benchmarks.ode_integrators``.
+"""
+
+import time
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from mcs import ODE
+
+PARAMS = dict(a=1.1, b=0.4, c=0.4, d=0.1)
+X0 = [10, 10]
+T = 100
+
+
+def run(method, dt, **kwargs):
+    max_step = int(round(T / dt)) + 1 if method != "rk45" else 100000
+    ode = ODE(max_step=max_step, dim=2, dt=dt, method=method, **kwargs)
+    ode.initialize(x0=X0)
+    f = ode.lv(**PARAMS)
+    start = time.perf_counter()
+    while ode.t[ode.step] < T and ode.step < max_step - 1:
+        ode.update(f=f)
+    elapsed = time.perf_counter() - start
+    return ode.dense([T], f=f)[0], ode.step, elapsed
+
+
+def main():
+    f = ODE.lv(**PARAMS)
+    exact = solve_ivp(lambda t, x: f(x), (0, T), X0, method="DOP853", rtol=1e-12, atol=1e-12).y[:, -1]
+    cases = [("euler", 0.01), ("euler", 0.001), ("rk4", 0.1), ("rk4", 0.01), ("rk45", 0.1, {"rtol": 1e-6})]
+    for method, dt, *kwargs in cases:
+        x, steps, elapsed = run(method, dt, **(kwargs[0] if kwargs else {}))
+        error = np.max(np.abs(x - exact))
+        print(f"{method:>6}  dt={dt:<6}  steps={steps:>7}  time={elapsed:8.4f}s  max error={error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
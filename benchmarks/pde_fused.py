@@ -0,0 +1,52 @@
+"""Transient memory and throughput per step of the fused Turing stepper against the generic one.
+
+The transient memory is the peak traced by `tracemalloc` during a step above what is held before it, in units of
+one full grid of all variables.
+
+Run from the repo root: ``python -m benchmarks.pde_fused``.
+"""
+
+import time
+import tracemalloc
+
+from mcs import PDE
+
+PARAMS = dict(a=1.0, b=-1.0, c=2.0, d=-1.5, h=1.0, k=1.0, Du=1e-4, Dv=6e-4, dh=0.01)
+STEPS = 50
+
+
+def measure(size, layout, **kwargs):
+    pde = PDE(max_step=STEPS + 1, dim=2, dt=0.02, dh=PARAMS["dh"], size=size, layout=layout, keep_last=2)
+    pde.initialize()
+    pde.update(**kwargs)
+    tracemalloc.start()
+    transient = 0
+    for _ in range(5):
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:  # Python 3.8
+            tracemalloc.stop()
+            tracemalloc.start()
+        current, _ = tracemalloc.get_traced_memory()
+        pde.update(**kwargs)
+        transient = max(transient, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    start = time.perf_counter()
+    pde.simulate(**kwargs)
+    steps_per_second = (STEPS - 6) / (time.perf_counter() - start)
+    return transient / (2 * size * size * 8), steps_per_second, pde.f[-1]
+
+
+def main():
+    for size in [128, 512, 1024]:
+        grids, generic, expected = measure(size, "aos", F=PDE.turing(**PARAMS))
+        fused_grids, fused, result = measure(size, "soa", G=PDE.turing_fused(**PARAMS, dt=0.02))
+        assert abs(result - expected.transpose(2, 0, 1)).max() < 1e-9
+        print(
+            f"size={size:>4}  generic: {grids:5.1f} grids/step {generic:7.1f} steps/s  "
+            f"fused: {fused_grids:5.1f} grids/step {fused:7.1f} steps/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
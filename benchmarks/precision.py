@@ -0,0 +1,118 @@
+"""Compact dtypes against the default float64 states: footprint, time and agreement.
+
+Run from the repo root: ``python -m benchmarks.precision``. Binary cellular automata in ``uint8`` and ``bool``
+must match float64 exactly, and float32 fields and ODEs within ``--rtol`` of the largest float64 state. Exits with
+an error otherwise, or if a kernel returns the next state, or its derivative, in another dtype than the states.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from mcs import CA, DE, ODE, PDE
+
+TURING = dict(a=1.0, b=-1.0, c=2.0, d=-1.5, h=1.0, k=1.0, Du=1e-4, Dv=6e-4, dh=0.01)
+
+
+def ca_rule184(dtype):
+    ca = CA(500, 10000, dtype=dtype)
+    ca.initialize()
+    return ca, {"F": CA.rule184}
+
+
+def ca_game_of_life(dtype):
+    ca = CA(50, 128, 128, dtype=dtype)
+    ca.initialize()
+    return ca, {"F": CA.game_of_life}
+
+
+def ca_life_like(dtype):
+    ca = CA(100, 256, 256, dtype=dtype)
+    ca.initialize()
+    return ca, {"F": CA.life_like("B3/S23")}
+
+
+def pde_turing(dtype):
+    pde = PDE(500, 2, 0.02, 0.01, 64, dtype=dtype)
+    pde.initialize()
+    return pde, {"F": PDE.turing(**TURING)}
+
+
+def pde_spectral(dtype):
+    pde = PDE(500, 2, 0.02, 0.01, 64, dtype=dtype)
+    pde.initialize()
+    return pde, {"G": PDE.turing_spectral(**TURING, dt=0.02, size=64)}
+
+
+def pde_fused(dtype):
+    pde = PDE(500, 2, 0.02, 0.01, 64, layout="soa", dtype=dtype)
+    pde.initialize()
+    return pde, {"G": PDE.turing_fused(**TURING, dt=0.02)}
+
+
+def ode_rk4(dtype):
+    ode = ODE(1000, 2, 0.01, batch=1000, method="rk4", dtype=dtype)
+    ode.initialize(x0=np.random.default_rng(0).uniform(1, 10, (1000, 2)))
+    return ode, {"f": ODE.lv(1, 0.1, 1.5, 0.075)}
+
+
+def de_logistic(dtype):
+    de = DE(100, 1, batch=1000, dtype=dtype)
+    de.initialize(x0=np.random.default_rng(0).random((1000, 1)))
+    return de, {"f": lambda x: 2.8 * x * (1 - x)}
+
+
+# name: (setup, compact dtypes, exact)
+CASES = {
+    "ca.rule184": (ca_rule184, ["uint8", "bool"], True),
+    "ca.game_of_life": (ca_game_of_life, ["uint8", "bool"], True),
+    "ca.life_like": (ca_life_like, ["uint8", "bool"], True),
+    "pde.turing": (pde_turing, ["float32"], False),
+    "pde.turing_spectral": (pde_spectral, ["float32"], False),
+    "pde.turing_fused": (pde_fused, ["float32"], False),
+    "ode.rk4": (ode_rk4, ["float32"], False),
+    "de.logistic": (de_logistic, ["float32"], False),
+}
+
+
+def simulate(setup, dtype):
+    model, kwargs = setup(dtype)
+    start = time.perf_counter()
+    model.simulate(**kwargs)
+    seconds = time.perf_counter() - start
+    frames = getattr(model, model._histories[0])
+    (kernel,) = kwargs.values()
+    kernel_dtype = np.asarray(kernel(np.array(frames[0]))).dtype
+    return np.asarray(frames), seconds, frames.nbytes, kernel_dtype
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only run the cases whose names contain this")
+    parser.add_argument("--rtol", type=float, default=1e-3, help="max error of float32 relative to the max state")
+    args = parser.parse_args()
+    failures = []
+    for name, (setup, dtypes, exact) in CASES.items():
+        if args.filter not in name:
+            continue
+        simulate(setup, "float64")  # warm up the imports and caches
+        reference, seconds, nbytes, _ = simulate(setup, "float64")
+        for dtype in dtypes:
+            states, compact_seconds, compact_nbytes, kernel_dtype = simulate(setup, dtype)
+            error = np.abs(states.astype(float) - reference).max() / max(np.abs(reference).max(), 1)
+            print(
+                f"{name:<22} {dtype:<8} {nbytes / compact_nbytes:5.1f}x smaller  "
+                f"{seconds / compact_seconds:5.2f}x faster  error={error:.2e}"
+            )
+            if kernel_dtype != dtype:
+                failures.append(f"{name} upcasts {dtype} to {kernel_dtype}")
+            elif error > (0 if exact else args.rtol):
+                failures.append(f"{name} in {dtype} differs by {error:.2e}")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Frames per second of the cached :class:`Renderer` scrubbing through every step, from step 0, of each model.
+
+Run from the repo root: ``python -m benchmarks.render``. Also exports the default animation of every model, all
+steps from step 0, to a temporary GIF, so a model whose first frame cannot be drawn fails the run.
+"""
+
+import os
+import tempfile
+import time
+
+import matplotlib
+import numpy as np
+
+matplotlib.use("Agg")
+
+from mcs import CA, DE, ODE, PDE, Net, Renderer  # noqa: E402
+
+TURING = dict(a=1.0, b=-1.0, c=2.0, d=-1.5, h=1.0, k=1.0, Du=1e-4, Dv=6e-4, dh=0.01)
+
+
+def ode(steps):
+    model = ODE(steps, 2, 0.01)
+    model.initialize(x0=[10, 5])
+    model.simulate(f=ODE.lv(1, 0.1, 1.5, 0.075))
+    return model
+
+
+def ode_batch(steps):
+    model = ODE(steps, 2, 0.01, batch=8)
+    model.initialize(x0=np.random.default_rng(0).uniform(1, 10, (8, 2)))
+    model.simulate(f=ODE.lv(1, 0.1, 1.5, 0.075))
+    return model
+
+
+def de(steps):
+    model = DE(steps, 1, batch=4)
+    model.initialize(x0=np.random.default_rng(0).random((4, 1)))
+    model.simulate(f=lambda x: 2.8 * x * (1 - x))
+    return model
+
+
+def ca(steps):
+    model = CA(steps, 64, 64)
+    model.initialize()
+    model.simulate(F=CA.game_of_life)
+    return model
+
+
+def ca_elementary(steps):
+    model = CA(steps, 128)
+    model.initialize()
+    model.simulate(F=CA.rule184)
+    return model
+
+
+def pde(steps):
+    model = PDE(steps, 2, 0.02, 0.01, 32)
+    model.initialize()
+    model.simulate(F=PDE.turing(**TURING))
+    return model
+
+
+def net(steps):
+    model = Net(steps)
+    model.initialize()
+    model.simulate(a=1, b=0.1, dt=0.01)
+    return model
+
+
+CASES = {
+    "ode": ode,
+    "ode.batch": ode_batch,
+    "de.batch": de,
+    "ca.life": ca,
+    "ca.elementary": ca_elementary,
+    "pde.turing": pde,
+    "net.oscillators": net,
+}
+
+
+def main():
+    steps = 50
+    with tempfile.TemporaryDirectory() as directory:
+        for name, setup in CASES.items():
+            renderer = Renderer(setup(steps))
+            renderer.draw(0)
+            start = time.perf_counter()
+            for step in range(steps):
+                renderer.draw(step)
+            fps = steps / (time.perf_counter() - start)
+            path = os.path.join(directory, f"{name}.gif")
+            renderer.animate(path, fps=50, dpi=30)
+            assert os.path.getsize(path) > 0
+            renderer.close()
+            print(f"{name:<16} draw={fps:8.1f} frames/s  animate={os.path.getsize(path) / 1024:6.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Benchmark suite of every model over a range of sizes, with comparison tables between commits.
+
+Run from the repo root::
+
+    python -m benchmarks.run                      # writes benchmarks/results/<commit>.json
+    python -m benchmarks.run --quick -k ca        # the smallest sizes of the cases matching "ca"
+    python -m benchmarks.run --compare a1b2c3d 4e5f6a7
+
+Each case is timed as the best of `--repeat` runs of :meth:`MCS.simulate`, excluding setup, and its peak memory
+is measured in a separate run traced by :class:`mcs.Profiler`. Throughput is in steps and in elements, i.e. cells,
+nodes or ensemble members, per second.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from mcs import CA, DE, ODE, PDE, Net, Profiler
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+TURING = dict(a=1.0, b=-1.0, c=2.0, d=-1.5, h=1.0, k=1.0, Du=1e-4, Dv=6e-4, dh=0.01)
+
+
+def ca_rule184(n, steps):
+    ca = CA(steps, n)
+    ca.initialize()
+    return ca, {"F": CA.rule184}, n
+
+
+def ca_packed(n, steps):
+    ca = CA(steps, n, packed=True)
+    ca.initialize()
+    return ca, {"F": CA.elementary_packed(184, n)}, n
+
+
+def ca_game_of_life(n, steps):
+    ca = CA(steps, n, n)
+    ca.initialize()
+    return ca, {"F": CA.game_of_life}, n * n
+
+
+def ca_life_like(n, steps):
+    ca = CA(steps, n, n)
+    ca.initialize()
+    return ca, {"F": CA.life_like("B3/S23")}, n * n
+
+
+def ca_rule184_active(n, steps):
+    ca = CA(steps, n)
+    ca.initialize(density=0.01)
+    return ca, {"F": CA.elementary(184, active=0.1)}, n
+
+
+def ca_life_like_active(n, steps):
+    ca = CA(steps, n, n)
+    ca.initialize(density=0.01)
+    return ca, {"F": CA.life_like("B3/S23", active=0.1)}, n * n
+
+
+def pde_turing(n, steps):
+    pde = PDE(steps, 2, 0.02, 0.01, n)
+    pde.initialize()
+    return pde, {"F": PDE.turing(**TURING)}, n * n
+
+
+def pde_spectral(n, steps):
+    pde = PDE(steps, 2, 0.02, 0.01, n)
+    pde.initialize()
+    return pde, {"G": PDE.turing_spectral(**TURING, dt=0.02, size=n)}, n * n
+
+
+def pde_fused(n, steps):
+    pde = PDE(steps, 2, 0.02, 0.01, n, layout="soa")
+    pde.initialize()
+    return pde, {"G": PDE.turing_fused(**TURING, dt=0.02)}, n * n
+
+
+def net_oscillators(n, steps):
+    net = Net(steps, seed=0)
+    net.initialize(graph=Net.watts_strogatz(n, 6, 0.1))
+    return net, {"a": 0.5, "b": 0.2, "dt": 0.05}, n
+
+
+def ode_method(method):
+    def setup(n, steps):
+        ode = ODE(steps, 2, 0.01, batch=n, method=method)
+        ode.initialize(x0=np.random.default_rng(0).uniform(1, 10, (n, 2)))
+        return ode, {"f": ODE.lv(1, 0.1, 1.5, 0.075)}, n
+
+    return setup
+
+
+def de_logistic(n, steps):
+    de = DE(steps, 1, batch=n)
+    de.initialize(x0=np.random.default_rng(0).random((n, 1)))
+    return de, {"f": lambda x: 3.7 * x * (1 - x)}, n
+
+
+# name: (setup, size parameter, sizes, steps)
+CASES = {
+    "ca.rule184": (ca_rule184, "cells", [1000, 10000, 100000], 200),
+    "ca.elementary_packed": (ca_packed, "cells", [1000, 10000, 100000], 200),
+    "ca.game_of_life": (ca_game_of_life, "grid", [64, 128, 256], 20),
+    "ca.life_like": (ca_life_like, "grid", [64, 256, 1024], 20),
+    "ca.rule184_active": (ca_rule184_active, "cells", [1000, 10000, 100000], 200),
+    "ca.life_like_active": (ca_life_like_active, "grid", [64, 256, 1024], 20),
+    "pde.turing": (pde_turing, "grid", [32, 64, 128], 50),
+    "pde.turing_spectral": (pde_spectral, "grid", [32, 64, 128], 50),
+    "pde.turing_fused": (pde_fused, "grid", [32, 64, 128], 50),
+    "net.coupled_oscillators": (net_oscillators, "nodes", [100, 10000, 100000], 200),
+    "ode.euler": (ode_method("euler"), "batch", [1, 100, 10000], 200),
+    "ode.rk4": (ode_method("rk4"), "batch", [1, 100, 10000], 200),
+    "ode.rk45": (ode_method("rk45"), "batch", [1, 100, 10000], 200),
+    "de.logistic": (de_logistic, "batch", [1, 100, 10000], 1000),
+}
+
+
+def commit():
+    """Returns the short hash of HEAD, suffixed with ``+dirty`` if tracked files are modified."""
+    try:
+        head = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return head.stdout.strip() + ("+dirty" if status.stdout.strip() else "")
+
+
+def measure(setup, n, steps, repeat):
+    seconds = float("inf")
+    for _ in range(repeat):
+        model, kwargs, elements = setup(n, steps)
+        start = time.perf_counter()
+        model.simulate(**kwargs)
+        seconds = min(seconds, time.perf_counter() - start)
+    model, kwargs, elements = setup(n, steps)
+    profiler = Profiler(memory=True)
+    model.simulate(observers=[profiler], **kwargs)
+    summary = profiler.summary()
+    return {
+        "seconds": seconds,
+        "steps_per_second": (steps - 1) / seconds,
+        "elements_per_second": (steps - 1) * elements / seconds,
+        "peak_bytes": summary["peak_allocated_bytes"],
+        "state_bytes": summary["state_bytes"],
+    }
+
+
+def run(names, quick=False, repeat=3):
+    results = []
+    for name in names:
+        setup, param, sizes, steps = CASES[name]
+        for n in sizes[:1] if quick else sizes:
+            result = {"case": name, "param": param, "size": n, "steps": steps, **measure(setup, n, steps, repeat)}
+            print(
+                f"{name:<24} {param}={n:<7} {result['seconds'] * 1e3:10.2f} ms  "
+                f"{result['elements_per_second']:12.4g} elements/s  {result['peak_bytes'] / 2**20:8.2f} MiB peak"
+            )
+            results.append(result)
+    return results
+
+
+def load(name):
+    path = name if os.path.exists(name) else os.path.join(RESULTS, f"{name}.json")
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(base, head, threshold=0.1):
+    """Prints a table of the time ratios of the cases benchmarked in both runs."""
+    base, head = load(base), load(head)
+    before = {(r["case"], r["size"]): r for r in base["results"]}
+    print(f"{'case':<24} {'size':>7} {base['commit']:>12} {head['commit']:>12} {'ratio':>7}")
+    for r in head["results"]:
+        b = before.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        ratio = r["seconds"] / b["seconds"]
+        flag = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        print(
+            f"{r['case']:<24} {r['size']:>7} {b['seconds'] * 1e3:10.2f}ms {r['seconds'] * 1e3:10.2f}ms "
+            f"{ratio:7.2f} {flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only run the cases whose names contain this")
+    parser.add_argument("--quick", action="store_true", help="only run the smallest size of each case")
+    parser.add_argument("--repeat", type=int, default=3, help="time the best of this many runs")
+    parser.add_argument("--output", help="the JSON file to write, by default benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two result files or commits")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    names = [name for name in CASES if args.filter in name]
+    meta = {
+        "commit": commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+    results = run(names, args.quick, args.repeat)
+    path = args.output or os.path.join(RESULTS, f"{meta['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({**meta, "results": results}, file, indent=2)
+    print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
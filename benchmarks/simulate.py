@@ -0,0 +1,44 @@
+"""Steps per second of the logistic map through per-step updates, the fast path of simulate and a compiled kernel.
+
+Run from the repo root: ``python -m benchmarks.simulate``.
+"""
+
+import time
+
+import numpy as np
+
+from mcs import DE, kernel
+
+
+def logistic(x):
+    return 3.7 * x * (1 - x)
+
+
+def steps_per_second(simulate, steps):
+    de = DE(steps, 1)
+    de.initialize(x0=[0.2])
+    start = time.perf_counter()
+    simulate(de)
+    return de.x, steps / (time.perf_counter() - start)
+
+
+def per_step(de):
+    while de.step < de.max_step - 1:
+        de.update(f=logistic)
+
+
+def main():
+    steps = 100000
+    expected, update = steps_per_second(per_step, steps)
+    result, fast = steps_per_second(lambda de: de.simulate(f=logistic), steps)
+    assert np.array_equal(result, expected)
+    print(f"update={update:10.0f}  simulate={fast:10.0f}  steps/s  speedup={fast / update:6.1f}x")
+    F = kernel(logistic, kind="map")
+    steps_per_second(lambda de: de.simulate(f=F), 2)
+    result, compiled = steps_per_second(lambda de: de.simulate(f=F), steps)
+    assert np.allclose(result, expected)
+    print(f"kernel={compiled:10.0f}  steps/s  backend={F.backend}  speedup={compiled / update:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Steps per second of domain-decomposed Life-like stepping against the number of strips and workers.
+
+Run from the repo root: ``python -m benchmarks.tiling``. The speedup is bounded by the number of cores. Both
+executors are measured, processes stepping in place on shared memory as the output is passed back in.
+"""
+
+import functools
+import os
+import time
+
+import numpy as np
+
+from mcs import CA, Tiled
+
+
+def steps_per_second(F, config, steps):
+    start = time.perf_counter()
+    for _ in range(steps):
+        config = F(config)
+    return config, steps / (time.perf_counter() - start)
+
+
+def main():
+    size, steps = 4096, 5
+    config = np.random.default_rng(0).integers(2, size=(size, size)).astype(np.uint8)
+    expected, serial = steps_per_second(CA.life_like("B3/S23"), config, steps)
+    print(f"cores={os.cpu_count()}  size={size}x{size}  serial={serial:6.2f} steps/s")
+    for tiles in [1, 2, 4, 8]:
+        line = f"tiles={tiles:>2}"
+        for executor in ["thread", "process"]:
+            with Tiled(functools.partial(CA.life_like, "B3/S23"), tiles=tiles, executor=executor) as F:
+                F(config)  # warm up the workers
+                result, tiled = steps_per_second(F, config, steps)
+                result = np.array(result)
+            assert np.array_equal(result, expected)
+            line += f"  {executor}={tiled:6.2f} steps/s  speedup={tiled / serial:5.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import streamlit as st
 
-from mcs import CA, ODE, PDE, Net
+from mcs import CA, ODE, PDE, Net, Renderer
 
 
 def intro():
@@ -67,7 +67,7 @@ def game_of_life():
     def simulate(max_step, x, y):
         ca = CA(max_step=max_step, size_x=x, size_y=y)
         ca.initialize()
-        ca.simulate(F=ca.game_of_life)
+        ca.simulate(F=ca.life_like("B3/S23"))
         return ca
 
     with st.form("parameters"):
@@ -80,12 +80,12 @@ def game_of_life():
 
         if st.form_submit_button("Submit"):
             st.session_state["ca"] = simulate(max_step, x, y)
+            st.session_state["ca_renderer"] = Renderer(st.session_state["ca"])
 
     if "ca" in st.session_state:
         max_step_ = max_step - 1
-        model = st.session_state["ca"]
         step = st.slider("Step", min_value=0, max_value=max_step_, value=max_step_)
-        fig = model.visualize(step=step)
+        fig = st.session_state["ca_renderer"].draw(step)
         st.pyplot(fig)
 
 
@@ -135,15 +135,15 @@ def turing():
 
         if st.form_submit_button("Submit"):
             st.session_state["pde"] = simulate(args_pde, args_turing)
+            st.session_state["pde_renderer"] = Renderer(st.session_state["pde"], indices=[0])
 
     if "pde" in st.session_state:
         max_step = args_pde["max_step"] - 1
-        model = st.session_state["pde"]
         step = st.slider("Step", min_value=0, max_value=max_step, value=max_step)
-        figs = model.visualize(step=step)
-        ax, _ = figs[0].axes
+        fig = st.session_state["pde_renderer"].draw(step)
+        ax, _ = fig.axes
         ax.set(title=r"Density of $u$")
-        st.pyplot(figs[0])
+        st.pyplot(fig)
 
 
 def oscillator():
@@ -155,7 +155,7 @@ def oscillator():
 
         $\frac{d\theta_i}{dt} = b\theta_i + a\sum_{j\in N_i}(\theta_j-\theta_i)$
 
-        Here $\theta_i$ is the state and $N_i$ is the neighborhood of node $i$. Stable trajetory occurs when $b - a\lambda_2 < 0$, where $a\ge 0$ and $\lambda_2$ is the second smallest eigenvalue (the spectral gap) of Laplacian matrix. The spectral gap of Karate Club graph is 0.4685, so when $a=2$ and $b=0.9$, the synchronization occurs.
+        Here $\theta_i$ is the state and $N_i$ is the neighborhood of node $i$. Stable trajetory occurs when $b - a\lambda_2 < 0$, where $a\ge 0$ and $\lambda_2$ is the second smallest eigenvalue (the spectral gap) of Laplacian matrix.
 
         The colors are based on the states of the nodes.
         """
@@ -183,12 +183,20 @@ def oscillator():
 
         if st.form_submit_button("Submit"):
             st.session_state["net"] = simulate(max_step, args_sync)
+            st.session_state["net_renderer"] = Renderer(st.session_state["net"])
 
     if "net" in st.session_state:
+        net = st.session_state["net"]
+        gap = net.spectral_gap
+        occurs = "occurs" if net.synchronizes(args_sync["a"], args_sync["b"]) else "does not occur"
+        st.markdown(
+            rf"The spectral gap of Karate Club graph is {gap:.4f}, so when $a={args_sync['a']}$ and "
+            rf"$b={args_sync['b']}$, $b - a\lambda_2 = {args_sync['b'] - args_sync['a'] * gap:.4f}$ and the "
+            f"synchronization {occurs}."
+        )
         max_step_ = max_step - 1
-        model = st.session_state["net"]
         step = st.slider("Step", min_value=0, max_value=max_step_, value=max_step_)
-        fig = model.visualize(step=step)
+        fig = st.session_state["net_renderer"].draw(step)
         st.pyplot(fig)
 
 
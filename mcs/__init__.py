@@ -1,9 +1,50 @@
 __version__ = "0.3.0"
 
+import importlib
+
 from .de import DE
 from .ode import ODE
 from .ca import CA
 from .pde import PDE
 from .net import Net
+from .hashlife import HashLife
+from .history import History
+from .jit import Kernel, kernel
+from .profiling import Observer, Profiler
+from .checkpoint import Checkpointer
+from .detect import CycleDetector
+
+# Imported on first access, see __getattr__, as they pull in process pools and shared memory.
+_lazy = {"Tiled": ".tiling", "Renderer": ".render", "sweep": ".sweep"}
+
+__all__ = [
+    "DE",
+    "ODE",
+    "CA",
+    "PDE",
+    "Net",
+    "HashLife",
+    "History",
+    "Tiled",
+    "Kernel",
+    "kernel",
+    "Observer",
+    "Profiler",
+    "Checkpointer",
+    "CycleDetector",
+    "Renderer",
+    "sweep",
+]
+
+
+def __getattr__(name):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_lazy[name], __name__)
+    value = module if name == "sweep" else getattr(module, name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["DE", "ODE", "CA", "PDE", "Net"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
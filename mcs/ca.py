@@ -1,3 +1,5 @@
+import weakref
+
 from .mcs import *
 
 
@@ -10,25 +12,54 @@ class CA(MCS):
         max_step: The max step.
         size_x: Number of cells in x dimension.
         size_y: Number of cells in y dimension.
-        seed: NumPy random seed.
+        seed: The seed of :attr:`rng`, an int or a `numpy.random.SeedSequence`, e.g. spawned by
+            :func:`mcs.sweep.seeds`.
+        packed: Whether 1D states are bit-packed into `numpy.uint64` words, see :meth:`pack`.
+        dtype: The name of the data type of the states, e.g. ``"uint8"`` or ``"bool"`` for 8 times less memory
+            than the default ``"float64"``. Ignored if packed.
         s: An `~numpy.ndarray` of shape (max_step, size_x) or (max_step, size_y, size_x) representing the states.
+            If packed, of shape (max_step, ceil(size_x / 64)).
         step: The current step.
     """
 
-    def __init__(self, max_step: int, size_x: int, size_y: int = 1, seed: int = 42):
-        super().__init__(max_step)
+    _histories = ("s",)
+    _kernel_kinds = {"F": ("cell", "map")}
+
+    def __init__(
+        self,
+        max_step: int,
+        size_x: int,
+        size_y: int = 1,
+        seed: int = 42,
+        packed: bool = False,
+        dtype=float,
+        **kwargs,
+    ):
+        super().__init__(max_step, **kwargs)
         self.size_x = size_x
         self.size_y = size_y
         self.seed = seed
-        if size_y == 1:
-            self.s = np.zeros((max_step, size_x))
+        self.packed = packed
+        self.dtype = np.dtype(dtype).name
+        if packed:
+            assert size_y == 1
+            self.s = self._history("s", (-(-size_x // 64),), np.uint64)
+        elif size_y == 1:
+            self.s = self._history("s", (size_x,), self.dtype)
         else:
-            self.s = np.zeros((max_step, size_y, size_x))
+            self.s = self._history("s", (size_y, size_x), self.dtype)
 
-    def initialize(self):
-        """Sets up the initial conﬁguration."""
-        np.random.seed(self.seed)
-        self.s[0] = np.random.randint(2, size=self.s[0].shape)
+    def initialize(self, *, density: float = 0.5):
+        """Sets up the initial conﬁguration.
+
+        Args:
+            density: The probability of a cell being alive.
+        """
+        self._reseed()
+        if self.packed:
+            self.s[0] = self.pack(self.random_config(self.rng, (self.size_x,), density))
+        else:
+            self.s[0] = self.random_config(self.rng, self.s[0].shape, density)
 
     def update(self, *, F: Callable = None):
         """Updates the states in the next step.
@@ -36,33 +67,286 @@ class CA(MCS):
         Args:
             F: A state transition function which returns an `~numpy.ndarray`.
         """
+        self._check_kernels({"F": F})
         if F is None:
             F = self._identity
         config = self.s[self.step]
         self.step += 1
-        self.s[self.step] = F(config)
+        if getattr(F, "stepped", False):
+            self.s[self.step] = F(config, self, self.step - 1)
+        else:
+            self.s[self.step] = F(config)
+
+    @staticmethod
+    def random_config(rng: np.random.Generator, shape, density: float = 0.5) -> np.ndarray:
+        """Returns a random binary configuration of `numpy.uint8` with live cells at a given density.
+
+        Sparse configurations draw the number of live cells and then their positions, so the cost scales with the
+        live cells rather than the grid.
+        """
+        size = int(np.prod(shape))
+        if density >= 0.1:
+            return (rng.random(shape) < density).astype(np.uint8)
+        config = np.zeros(size, dtype=np.uint8)
+        config[rng.choice(size, rng.binomial(size, density), replace=False)] = 1
+        return config.reshape(shape)
 
     @staticmethod
     def rule184(config):
-        assert config.ndim == 1
-        size = len(config)
-        config_next = np.zeros(size)
-        neighborhoods = set([(1, 1, 1), (1, 0, 1), (1, 0, 0), (0, 1, 1)])
-        for x in range(size):
-            pattern = (config[(x - 1) % size], config[x], config[(x + 1) % size])
-            if pattern in neighborhoods:
-                config_next[x] = 1
-        return config_next
+        """Traffic flow, the elementary rule 184."""
+        return CA.elementary(184)(config)
+
+    @staticmethod
+    def elementary(rule: int, radius: int = 1, totalistic: bool = False, active: float = None) -> Callable:
+        """Returns a 1D rule given by its Wolfram code.
+
+        The neighborhood of every cell is encoded as an index with `numpy.roll` and mapped through a lookup table,
+        so a step is a single vectorized pass.
+
+        Args:
+            rule: The rule number, e.g. 0-255 for the elementary rules.
+            radius: The number of neighbors on each side.
+            totalistic: If `True`, the next state only depends on the number of live cells in the neighborhood.
+            active: If not `None`, only the cells around the changes of the previous step are re-evaluated, unless
+                they are more than this fraction of the cells, see :meth:`active`.
+        Returns:
+            A state transition function.
+        """
+        width = 2 * radius + 1
+        n = width + 1 if totalistic else 2**width
+        assert 0 <= rule < 2**n
+        table = np.array([(rule >> i) & 1 for i in range(n)], dtype=np.uint8)
+
+        def F(config):
+            assert config.ndim == 1
+            cells = config.astype(np.intp)
+            index = np.zeros_like(cells)
+            for shift in range(radius, -radius - 1, -1):
+                if totalistic:
+                    index += np.roll(cells, shift)
+                else:
+                    index <<= 1
+                    index |= np.roll(cells, shift)
+            return table.astype(config.dtype)[index]
+
+        def local(config, cells):
+            index = np.zeros_like(cells)
+            for shift in range(radius, -radius - 1, -1):
+                neighbor = config[(cells - shift) % len(config)].astype(np.intp)
+                if totalistic:
+                    index += neighbor
+                else:
+                    index <<= 1
+                    index |= neighbor
+            return table[index]
+
+        if active is None:
+            return F
+        return CA.active(F, local, np.arange(-radius, radius + 1)[:, None], active)
+
+    @staticmethod
+    def elementary_packed(rule: int, size: int) -> Callable:
+        """Returns an elementary rule acting on bit-packed states, updating 64 cells per word operation.
+
+        Args:
+            rule: The rule number, 0-255.
+            size: The number of cells.
+        Returns:
+            A state transition function on the `numpy.uint64` words returned by :meth:`pack`.
+        """
+        assert 0 <= rule < 256
+        tail = size - 64 * (-(-size // 64) - 1)
+        one, msb, last = np.uint64(1), np.uint64(63), np.uint64(tail - 1)
+        mask = np.uint64(2**tail - 1)
+        minterms = [i for i in range(8) if (rule >> i) & 1]
+
+        def F(words):
+            left = (words << one) | (np.roll(words, 1) >> msb)
+            right = (words >> one) | (np.roll(words, -1) << msb)
+            left[0] = (left[0] & ~one) | ((words[-1] >> last) & one)
+            right[-1] = (right[-1] & ~(one << last)) | ((words[0] & one) << last)
+            literals = (~right, right), (~words, words), (~left, left)
+            words_next = np.zeros_like(words)
+            for i in minterms:
+                words_next |= literals[2][i >> 2 & 1] & literals[1][i >> 1 & 1] & literals[0][i & 1]
+            words_next[-1] &= mask
+            return words_next
+
+        return F
+
+    @staticmethod
+    def pack(config) -> np.ndarray:
+        """Packs binary states along the last axis into `numpy.uint64` words, cell `i` being bit `i % 64`."""
+        bits = np.packbits(np.asarray(config, dtype=bool), axis=-1, bitorder="little")
+        pad = [(0, 0)] * (bits.ndim - 1) + [(0, -bits.shape[-1] % 8)]
+        return np.pad(bits, pad).view("<u8").astype(np.uint64)
+
+    @staticmethod
+    def unpack(words, size: int) -> np.ndarray:
+        """Unpacks `numpy.uint64` words along the last axis into `size` binary states."""
+        bits = np.asarray(words).astype("<u8").view(np.uint8)
+        return np.unpackbits(bits, axis=-1, count=size, bitorder="little")
 
     @staticmethod
     def game_of_life(config):
         assert config.ndim == 2
         config_next = np.copy(config)
-        num_alive = signal.convolve2d(config, np.ones((3, 3)), mode="same", boundary="wrap")
+        cells = config.astype(np.uint8, copy=False)
+        num_alive = signal.convolve2d(cells, np.ones((3, 3), dtype=np.uint8), mode="same", boundary="wrap")
         config_next[(config == 0) & (num_alive == 3)] = 1
         config_next[(config == 1) & ((num_alive < 3) | (num_alive > 4))] = 0
         return config_next
 
+    @staticmethod
+    def life_like(rule: str = "B3/S23", active: float = None) -> Callable:
+        """Returns a 2D Life-like rule given by its rulestring, e.g. ``"B3/S23"`` for Conway's Game of Life.
+
+        Neighbors are counted in `numpy.uint8` by summing eight shifted slices of a wrapped copy into preallocated
+        buffers, and the function ping-pongs between two output buffers of the dtype of the states, so a step
+        allocates nothing. The returned array is reused two calls later.
+
+        Args:
+            rule: A rulestring ``"B.../S..."`` listing the neighbor counts for a birth and for survival.
+            active: If not `None`, only the cells around the changes of the previous step are re-evaluated, unless
+                they are more than this fraction of the cells, see :meth:`active`.
+        Returns:
+            A state transition function.
+        """
+        born, survive = CA._parse_rule(rule)
+        table = np.zeros((2, 9), dtype=np.uint8)
+        table[0, born] = 1
+        table[1, survive] = 1
+        table = table.ravel()
+        tables = {}
+        buffers = {}
+
+        def typed(dtype):
+            if dtype not in tables:
+                tables[dtype] = table.astype(dtype)
+            return tables[dtype]
+
+        def F(config):
+            assert config.ndim == 2
+            key = config.shape, config.dtype
+            if key not in buffers:
+                size_y, size_x = config.shape
+                padded = np.zeros((size_y + 2, size_x + 2), dtype=np.uint8)
+                shifts = [padded[dy:, dx:][:size_y, :size_x] for dy in range(3) for dx in range(3)]
+                del shifts[4]
+                counts = np.zeros((2, size_y, size_x), dtype=np.uint8)
+                buffers[key] = padded, shifts, counts, np.zeros((2, size_y, size_x), dtype=config.dtype), [0]
+            padded, shifts, (count, index), (out_0, out_1), parity = buffers[key]
+            padded[1:-1, 1:-1] = config
+            padded[0, 1:-1] = padded[-2, 1:-1]
+            padded[-1, 1:-1] = padded[1, 1:-1]
+            padded[:, 0] = padded[:, -2]
+            padded[:, -1] = padded[:, 1]
+            np.add(shifts[0], shifts[1], out=count)
+            for shift in shifts[2:]:
+                count += shift
+            out = out_0 if parity[0] == 0 else out_1
+            parity[0] ^= 1
+            np.multiply(padded[1:-1, 1:-1], 9, out=index)
+            index += count
+            return np.take(typed(config.dtype), index, out=out)
+
+        offsets = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+        def local(config, cells):
+            y, x = np.divmod(cells, config.shape[1])
+            count = np.zeros(len(cells), dtype=np.uint8)
+            for dy, dx in offsets:
+                if dy or dx:
+                    count += config[(y + dy) % config.shape[0], (x + dx) % config.shape[1]].astype(np.uint8)
+            return typed(config.dtype)[9 * config[y, x].astype(np.intp) + count]
+
+        if active is None:
+            return F
+        return CA.active(F, local, offsets, active)
+
+    @staticmethod
+    def active(dense: Callable, local: Callable, offsets, threshold: float = 0.1) -> Callable:
+        """Returns a rule re-evaluating only the active cells, i.e. those that changed in the previous step and
+        their neighbors, so the cost of a step scales with the active frontier rather than the grid.
+
+        The frontier is kept as a sorted array of flat cell indices, and the last output in a private buffer updated
+        in place at the cells that changed, so a sparse step costs O(frontier). :meth:`update` passes the model and
+        the step, and the configuration is taken as the last output if the rule produced it for the same model at
+        the previous step. Otherwise, e.g. the first step of a run or a call without the model, the configuration
+        is compared with the buffer as a whole, O(size) but far cheaper than a dense step, and the step is dense if
+        they differ. It is also dense when more than `threshold` of the cells are active. After a dense step the
+        frontier is rebuilt from the cells that changed, and while it stays too large it is rebuilt after
+        exponentially more dense steps, so busy configurations pay little for the tracking.
+
+        The returned array is updated in place by the next call, and the histories of a model must not be edited
+        between its steps.
+
+        Args:
+            dense: The state transition function of the whole configuration.
+            local: A function ``local(config, cells)`` returning the next states of the cells at the flat indices
+                `cells`.
+            offsets: An array of shape (number of neighbors, config.ndim) of the offsets of the neighborhood,
+                including the cell itself.
+            threshold: The max fraction of active cells for a sparse step.
+        Returns:
+            A state transition function ``F(config, model=None, step=None)``.
+        """
+        offsets = np.asarray(offsets)
+        memory = {"cells": None, "state": None, "wait": 0, "patience": 1, "model": None, "step": None}
+
+        def around(changed, shape):
+            coords = np.unravel_index(changed, shape)
+            cells = [(c + offset[:, None]) % n for c, offset, n in zip(coords, offsets.T, shape)]
+            return np.unique(np.ravel_multi_index(cells, shape))
+
+        def matches(config, state, model, step):
+            if state.shape != config.shape or state.dtype != config.dtype:
+                return False
+            last = memory["model"]
+            if model is not None and last is not None and last() is model and memory["step"] == step:
+                return True
+            return np.array_equal(config, state)
+
+        def F(config, model=None, step=None):
+            cells, state = memory["cells"], memory["state"]
+            reuse = cells is not None and matches(config, state, model, step)
+            memory.update(model=None if model is None else weakref.ref(model), step=None if step is None else step + 1)
+            if reuse:
+                values = local(config, cells)
+                last = state.reshape(-1)
+                differ = values != last[cells]
+                changed = cells[differ]
+                last[changed] = values[differ]
+                out = state
+            else:
+                out = dense(config)
+                memory["cells"] = None
+                if memory["wait"] > 0:
+                    memory["wait"] -= 1
+                    return out
+                changed = np.flatnonzero(out != config)
+                if state is None or state.shape != out.shape or state.dtype != out.dtype:
+                    state = memory["state"] = np.array(out)
+                else:
+                    state[...] = out
+                out = state
+            cells = around(changed, config.shape) if len(changed) <= threshold * config.size else None
+            if cells is not None and len(cells) <= threshold * config.size:
+                memory.update(cells=cells, patience=1)
+            else:
+                memory.update(cells=None, wait=memory["patience"], patience=min(2 * memory["patience"], 64))
+            return out
+
+        F.stepped = True
+        return F
+
+    @staticmethod
+    def _parse_rule(rule):
+        """Parses a rulestring ``"B.../S..."`` into the neighbor counts for a birth and for survival."""
+        parts = dict((part[:1].upper(), part[1:]) for part in rule.split("/"))
+        assert set(parts) == {"B", "S"}
+        return [int(n) for n in parts["B"]], [int(n) for n in parts["S"]]
+
     def visualize(self, *, step: int = -1):
         """Visualizes the states of the system using an image of shape (step, size_x) or (size_y, size_x).
 
@@ -72,7 +356,9 @@ class CA(MCS):
             A `matplotlib.figure.Figure` object.
         """
         fig, ax = plt.subplots()
-        if self.s.ndim == 2:
+        if self.packed:
+            ax.imshow(self.unpack(self.s[:step], self.size_x), cmap=plt.cm.binary)
+        elif self.s.ndim == 2:
             ax.imshow(self.s[:step], cmap=plt.cm.binary)
         elif self.s.ndim == 3:
             ax.imshow(self.s[step], cmap=plt.cm.binary)
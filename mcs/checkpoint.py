@@ -0,0 +1,25 @@
+from .profiling import Observer
+
+
+class Checkpointer(Observer):
+    """Periodic checkpointing of a run of :meth:`MCS.simulate`, passed as an observer.
+
+    Writes a snapshot with :meth:`MCS.checkpoint` every `every` steps and at the end of the run, replacing the
+    previous one, so :meth:`MCS.resume` continues from the latest.
+
+    Attributes:
+        path: The file of the snapshot.
+        every: The number of steps between snapshots.
+    """
+
+    def __init__(self, path: str, every: int):
+        self.path = path
+        self.every = every
+        self.block = every
+
+    def on_block(self, model, start, stop):
+        if stop // self.every > start // self.every:
+            model.checkpoint(self.path)
+
+    def on_finish(self, model):
+        model.checkpoint(self.path)
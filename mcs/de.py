@@ -7,38 +7,56 @@ class DE(MCS):
     Attributes:
         max_step: The max step.
         dim: The number of variables.
-        x: An `~numpy.ndarray` representing the states of shape (max_step, dim).
+        batch: If not `None`, the number of systems simulated together as an ensemble.
+        dtype: The name of the data type of the states, e.g. ``"float32"``.
+        x: An `~numpy.ndarray` representing the states of shape (max_step, dim), or (max_step, batch, dim).
         step: The current step.
     """
 
-    def __init__(self, max_step: int, dim: int):
-        super().__init__(max_step)
+    _histories = ("x",)
+    _kernel_kinds = {"f": ("map",)}
+
+    def __init__(self, max_step: int, dim: int, batch: int = None, dtype=float, **kwargs):
+        super().__init__(max_step, **kwargs)
         self.dim = dim
-        self.x = np.zeros((max_step, dim))
+        self.batch = batch
+        self.dtype = np.dtype(dtype).name
+        self.x = self._history("x", (dim,) if batch is None else (batch, dim), self.dtype)
 
     def initialize(self, *, x0: List[float] = None):
         """Sets up the initial values for the state variables.
 
         Args:
-            x0: A list of initial states.
+            x0: A list of initial states, or an array of shape (batch, dim) for an ensemble.
+                A single list is broadcast to every member of the ensemble.
         """
         if x0 is None:
-            x0 = [0] * len(self.dim)
-        assert len(x0) == self.dim
-        self.x[0] = x0
+            x0 = [0] * self.dim
+        assert np.shape(x0)[-1] == self.dim
+        self.x[0] = np.broadcast_to(x0, self.x[0].shape)
 
     def update(self, *, f: Callable = None):
         """Updates the states in the next step.
 
         Args:
-            f: A function, :math:`x_t = f(x_{t-1})`.
+            f: A function, :math:`x_t = f(x_{t-1})`, applied to the whole ensemble at once.
         """
+        self._check_kernels({"f": f})
         if f is None:
             f = self._identity
         x = self.x[self.step]
         self.step += 1
         self.x[self.step] = np.array(f(x))
 
+    def _run(self, stop, *, f: Callable = None):
+        """Iterates the map in a local loop, resolving `f` and the history once."""
+        f = self._identity if f is None else f
+        x, xs = self.x[self.step], self.x
+        for step in range(self.step + 1, stop):
+            x = np.asarray(f(x))
+            xs[step] = x
+        self.step = max(self.step, stop - 1)
+
     def visualize(self, *, step: int = -1, indices: List[int] = None):
         """Visualizes the series of states of the system.
 
@@ -52,5 +70,5 @@ class DE(MCS):
         fig, ax = plt.subplots()
         indices = np.arange(self.dim) if indices is None else indices
         for state in indices:
-            ax.plot(self.x[:step, state])
+            ax.plot(self.x[:step, ..., state])
         return fig
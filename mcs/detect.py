@@ -0,0 +1,128 @@
+import hashlib
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from .ca import CA
+from .hashlife import HashLife
+from .profiling import Observer
+
+
+class CycleDetector(Observer):
+    """Detection of fixed points and cycles of the states of a run of :meth:`MCS.simulate`, stopping it early.
+
+    Every step, the state is reduced to a compact fingerprint, a hash of the bit-packed grid of a :class:`CA`, of the
+    live cells of the whole universe of :class:`HashLife` or of the floating-point states rounded to `decimals`, and looked up in a cache of the fingerprints of the last
+    `capacity` steps. A repeated fingerprint gives the transient, the first step of the cycle, and the period, 1
+    for a fixed point, e.g. a still life or a converged map.
+
+    Pass it as `until`, or as an observer, which also resets it at the start of every run::
+
+        detector = CycleDetector(action="fast_forward")
+        ca.simulate(F=CA.life_like(), observers=[detector])
+
+    Only steps checked are fingerprinted, so keep one step per block, the default when passed either way.
+
+    Attributes:
+        decimals: If not `None`, floating-point states are rounded to this many decimals, so states converging
+            within the tolerance are taken as equal.
+        capacity: The max number of fingerprints cached. Longer cycles are not detected.
+        action: ``"stop"`` to stop the run at the first repeated state, ``"fast_forward"`` to also fill the rest of
+            the histories by repeating the cycle with :meth:`MCS.repeat`, or `None` to only report. Fast-forwarding
+            needs the histories to retain every step, so a `keep_every` above 1 raises a `ValueError` at the start,
+            as does a cycle longer than `keep_last` when detected.
+        trim: Whether to shrink the histories with :meth:`MCS.trim` when stopping, freeing the steps not simulated.
+        transform: If not `None`, a function applied to the state before fingerprinting, e.g. subtracting the
+            mean of the states of :class:`Net` to detect synchronization. States are then repeated up to the
+            transform, so do not fast-forward.
+        pack: Whether binary states are bit-packed before hashing. If `None`, for :class:`CA` unless packed.
+        transient: The first step of the detected cycle, or `None`.
+        period: The period of the detected cycle, or `None`.
+    """
+
+    def __init__(
+        self,
+        decimals: int = None,
+        capacity: int = 1024,
+        action: str = "stop",
+        trim: bool = False,
+        transform: Callable = None,
+        pack: bool = None,
+    ):
+        assert action in ("stop", "fast_forward", None)
+        assert capacity >= 1
+        self.decimals = decimals
+        self.capacity = capacity
+        self.action = action
+        self.trim = trim
+        self.transform = transform
+        self.pack = pack
+        self.reset()
+
+    def reset(self):
+        """Forgets the fingerprints and the cycle detected."""
+        self.transient = None
+        self.period = None
+        self._seen = OrderedDict()
+        self._model = None
+        self._step = None
+
+    def fingerprint(self, model, step: int = None) -> bytes:
+        """Returns the 128-bit hash of the state of a model at a step, by default the current one."""
+        if isinstance(model, HashLife):
+            assert step in (None, model.step)
+            state, pack = model.cells, False
+        else:
+            state = model.state if step is None else getattr(model, model._histories[0])[step]
+            pack = isinstance(model, CA) and not model.packed if self.pack is None else self.pack
+        state = np.asarray(state if self.transform is None else self.transform(state))
+        if pack:
+            state = np.packbits(state != 0)
+        elif self.decimals is not None and state.dtype.kind in "fc":
+            state = np.round(state, self.decimals) + 0.0
+        return hashlib.blake2b(np.ascontiguousarray(state).tobytes(), digest_size=16).digest()
+
+    def __call__(self, model) -> bool:
+        """Fingerprints the current step, returning whether to stop, i.e. a cycle is detected and :attr:`action` is
+        not `None`."""
+        if self._model is not model or self._step is None or model.step < self._step:
+            self.reset()
+            self._check(model)
+            self._model = model
+            if model.step > model.keep_from and model._histories:
+                self._seen[self.fingerprint(model, model.step - 1)] = model.step - 1
+        elif model.step == self._step or self.period is not None:
+            return self.period is not None and self.action is not None
+        self._step = model.step
+        key = self.fingerprint(model)
+        if key not in self._seen:
+            self._seen[key] = model.step
+            if len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            return False
+        self.transient = self._seen[key]
+        self.period = model.step - self.transient
+        if self.action == "fast_forward":
+            model.repeat(self.period)
+        elif self.action == "stop" and self.trim:
+            model.trim()
+        return self.action is not None
+
+    def on_start(self, model, kwargs):
+        self.reset()
+        self._check(model)
+        self._model, self._step = model, model.step
+        self._seen[self.fingerprint(model)] = model.step
+        return kwargs
+
+    def _check(self, model):
+        if self.action == "fast_forward" and model._histories and model.keep_every > 1:
+            raise ValueError(f"cannot fast-forward {type(model).__name__} keeping every {model.keep_every} steps")
+
+    def on_step(self, model):
+        return self(model)
+
+    def summary(self) -> dict:
+        """Returns the detected transient and period, and the step reached."""
+        return {"transient": self.transient, "period": self.period, "step": self._step}
@@ -0,0 +1,379 @@
+import itertools
+
+from .ca import CA
+from .mcs import *
+
+
+class _Node:
+    """A canonical quadtree node of level `level`, covering 2**level x 2**level cells."""
+
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+class HashLife(CA):
+    """Life-like cellular automata simulation by Hashlife.
+
+    The unbounded universe is a quadtree of hash-consed nodes, and the successors of nodes are memoized, so large
+    sparse patterns can be advanced by :math:`2^k` generations at once. Only the current generation is stored, and
+    :meth:`visualize` rasterizes just the requested viewport.
+
+    Attributes:
+        max_step: The max step.
+        size_x: Number of cells in x dimension of the initial configuration.
+        size_y: Number of cells in y dimension of the initial configuration.
+        seed: The seed of :attr:`rng`.
+        rule: The rulestring, see :meth:`CA.life_like`, without births from 0 neighbors, which would fill the
+            infinite empty plane.
+        max_nodes: The least recently used half of the caches of nodes and successors is evicted once they hold
+            more entries, checked before computing each successor.
+        root: The quadtree of the current generation, centered at the origin.
+        step: The current step, i.e. the generation.
+    """
+
+    _histories = ()
+
+    def __init__(
+        self,
+        max_step: int,
+        size_x: int,
+        size_y: int,
+        seed: int = 42,
+        rule: str = "B3/S23",
+        max_nodes: int = 2**22,
+        **kwargs,
+    ):
+        MCS.__init__(self, max_step, **kwargs)
+        self.size_x = size_x
+        self.size_y = size_y
+        self.seed = seed
+        self.rule = rule
+        self.max_nodes = max_nodes
+        self.packed = False
+        born, survive = CA._parse_rule(rule)
+        if 0 in born:
+            raise ValueError(f"{rule} gives birth in empty space, which HashLife cannot simulate on an infinite plane")
+        self._table = np.zeros((2, 9), dtype=bool)
+        self._table[0, born] = True
+        self._table[1, survive] = True
+        self._leaves = _Node(0, None, None, None, None, 0), _Node(0, None, None, None, None, 1)
+        self._nodes = {}
+        self._successors = {}
+        self._empty = [self._leaves[0]]
+        self._evictions = 0
+        self.root = None
+
+    def initialize(self, *, config=None, density: float = 0.5):
+        """Sets up the initial conﬁguration.
+
+        Args:
+            config: An `~numpy.ndarray` of shape (size_y, size_x) with the top-left cell at the origin.
+                If `None`, a random configuration.
+            density: The probability of a cell being alive in a random configuration.
+        """
+        if config is None:
+            self._reseed()
+            config = self.random_config(self.rng, (self.size_y, self.size_x), density)
+        level = max(3, int(np.ceil(np.log2(max(config.shape)))) + 1)
+        half = 2 ** (level - 1)
+        height, width = config.shape
+        cells = np.zeros((2**level, 2**level), dtype=bool)
+        cells[half:, half:][:height, :width] = config
+        self.root = self._build(cells)
+        self.step = 0
+
+    def update(self):
+        """Advances one generation."""
+        self.jump(1)
+
+    def simulate(
+        self,
+        stop_step: int = None,
+        *,
+        run: Callable = None,
+        block: int = None,
+        until: Callable = None,
+        observers: List[Observer] = (),
+        **kwargs,
+    ):
+        """Simulates the system till `stop_step`, jumping over the generations of every block at once.
+
+        See :meth:`MCS.simulate`. The whole run is a single :meth:`jump` unless `block`, `until` or observers
+        stepping every step split it into blocks.
+
+        Args:
+            stop_step: If `None`, stops at :attr:`max_step`.
+            run: Must be `None`, as there are no frames to fill.
+            block: The number of generations per block.
+            until: A predicate of the model checked after every block to stop early.
+            observers: A list of :class:`Observer` called back during the run.
+            **kwargs: Must be empty, as :meth:`update` takes no parameters.
+        """
+        assert run is None and not kwargs
+        super().simulate(stop_step, block=block, until=until, observers=observers)
+
+    def repeat(self, period: int, stop_step: int = None):
+        """Advances till `stop_step` by :meth:`jump`, which is exact whatever the detected `period`."""
+        stop_step = self.max_step if stop_step is None else stop_step
+        if self.step < stop_step - 1:
+            self.jump(stop_step - 1 - self.step)
+
+    def _run(self, stop):
+        if self.step < stop - 1:
+            self.jump(stop - 1 - self.step)
+
+    def jump(self, generations: int):
+        """Advances any number of generations, e.g. `2**k`, in time logarithmic in `generations`.
+
+        Args:
+            generations: The number of generations.
+        """
+        self.step += generations
+        root = self.root
+        j = 0
+        while generations:
+            if generations & 1:
+                evictions = self._evictions
+                while root.level < j + 2 or not self._centered(root):
+                    root = self._expand(root)
+                root = self._successor(self._expand(root), j)
+                if self._evictions != evictions:
+                    root = self._canonical(root, {})
+            generations >>= 1
+            j += 1
+        while root.level > 3 and self._centered(root):
+            root = self._join(root.nw.se, root.ne.sw, root.sw.ne, root.se.nw)
+        self.root = root
+
+    @property
+    def population(self) -> int:
+        """The number of live cells in the current generation."""
+        return self.root.population
+
+    @property
+    def cells(self) -> np.ndarray:
+        """The coordinates (y, x) of the live cells of the whole universe, in lexicographic order, an array of
+        shape (population, 2)."""
+        cells = self._state()["cells"]
+        return cells[np.lexsort(cells.T[::-1])]
+
+    @property
+    def state(self) -> np.ndarray:
+        """The initial viewport of the current generation, see :meth:`raster`."""
+        return self.raster()
+
+    def raster(self, viewport=None) -> np.ndarray:
+        """Rasterizes a viewport of the current generation.
+
+        Args:
+            viewport: A tuple (x, y, width, height). If `None`, the initial (0, 0, size_x, size_y).
+        Returns:
+            An `~numpy.ndarray` of shape (height, width).
+        """
+        x, y, width, height = (0, 0, self.size_x, self.size_y) if viewport is None else viewport
+        out = np.zeros((height, width), dtype=np.uint8)
+        half = 2 ** (self.root.level - 1)
+        self._raster(self.root, -half, -half, out, x, y)
+        return out
+
+    def visualize(self, *, step: int = -1, viewport=None):
+        """Visualizes a viewport of the current generation using an image.
+
+        Args:
+            step: The step to plot, which must be the current step.
+            viewport: A tuple (x, y, width, height). If `None`, the initial (0, 0, size_x, size_y).
+        Returns:
+            A `matplotlib.figure.Figure` object.
+        """
+        assert step in (-1, self.step)
+        fig, ax = plt.subplots()
+        ax.imshow(self.raster(viewport), cmap=plt.cm.binary)
+        return fig
+
+    def _state(self):
+        cells = []
+        half = 2 ** (self.root.level - 1)
+        self._cells(self.root, -half, -half, cells)
+        return {"cells": np.array(cells, dtype=np.int64).reshape(-1, 2), "level": np.asarray(self.root.level)}
+
+    def _restore(self, state):
+        level = int(state["level"])
+        self.root = self._build_sparse(state["cells"] + 2 ** (level - 1), level)
+
+    def _cells(self, node, x, y, out):
+        """Appends the coordinates (y, x) of the live cells of `node`, whose top-left cell is at (y, x), to `out`."""
+        if node.population == 0:
+            return
+        if node.level == 0:
+            out.append((y, x))
+            return
+        half = 2 ** (node.level - 1)
+        self._cells(node.nw, x, y, out)
+        self._cells(node.ne, x + half, y, out)
+        self._cells(node.sw, x, y + half, out)
+        self._cells(node.se, x + half, y + half, out)
+
+    def _build_sparse(self, cells, level):
+        """Returns the node of `level` whose live cells are at the coordinates (y, x) of `cells` from its corner."""
+        if len(cells) == 0:
+            return self._empty_node(level)
+        if level == 0:
+            return self._leaves[1]
+        half = 2 ** (level - 1)
+        south, east = cells[:, 0] >= half, cells[:, 1] >= half
+        offset = np.array([half, half])
+        return self._join(
+            self._build_sparse(cells[~south & ~east], level - 1),
+            self._build_sparse(cells[~south & east] - offset * [0, 1], level - 1),
+            self._build_sparse(cells[south & ~east] - offset * [1, 0], level - 1),
+            self._build_sparse(cells[south & east] - offset, level - 1),
+        )
+
+    def _evict(self):
+        """Drops the least recently used half of the caches of nodes and of successors, which are kept in the order
+        of use. Nodes dropped are still valid but no longer canonical, see :meth:`_canonical`."""
+        for cache in (self._nodes, self._successors):
+            for key in list(itertools.islice(cache, (len(cache) + 1) // 2)):
+                del cache[key]
+        self._empty = [self._leaves[0]]
+        self._evictions += 1
+
+    def _canonical(self, node, memo):
+        """Returns the canonical node with the same cells as `node`, e.g. one built before an eviction."""
+        if node.level == 0:
+            return self._leaves[node.population]
+        if node.population == 0:
+            return self._empty_node(node.level)
+        result = memo.get(node)
+        if result is None:
+            children = node.nw, node.ne, node.sw, node.se
+            result = memo[node] = self._join(*(self._canonical(child, memo) for child in children))
+        return result
+
+    def _join(self, nw, ne, sw, se):
+        key = nw, ne, sw, se
+        node = self._nodes.pop(key, None)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = _Node(nw.level + 1, nw, ne, sw, se, population)
+        self._nodes[key] = node
+        return node
+
+    def _empty_node(self, level):
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self._join(e, e, e, e))
+        return self._empty[level]
+
+    def _build(self, cells):
+        if len(cells) == 1:
+            return self._leaves[int(cells[0, 0])]
+        level = int(np.log2(len(cells)))
+        if not cells.any():
+            return self._empty_node(level)
+        half = len(cells) // 2
+        return self._join(
+            self._build(cells[:half, :half]),
+            self._build(cells[:half, half:]),
+            self._build(cells[half:, :half]),
+            self._build(cells[half:, half:]),
+        )
+
+    def _expand(self, node):
+        """Returns the node of the next level with `node` at its center."""
+        e = self._empty_node(node.level - 1)
+        return self._join(
+            self._join(e, e, e, node.nw),
+            self._join(e, e, node.ne, e),
+            self._join(e, node.sw, e, e),
+            self._join(node.se, e, e, e),
+        )
+
+    @staticmethod
+    def _centered(node):
+        """Whether all live cells lie in the central quarter of `node`."""
+        center = node.nw.se.population + node.ne.sw.population + node.sw.ne.population + node.se.nw.population
+        return node.population == center
+
+    def _successor(self, node, j):
+        """Returns the center of `node`, of one level lower, advanced `2**j` generations, `j <= node.level - 2`."""
+        key = node, j
+        result = self._successors.pop(key, None)
+        if result is not None:
+            self._successors[key] = result
+            return result
+        if len(self._nodes) + len(self._successors) > self.max_nodes:
+            self._evict()
+        if node.population == 0:
+            result = node.nw
+        elif node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            n = [
+                [nw, self._join(nw.ne, ne.nw, nw.se, ne.sw), ne],
+                [
+                    self._join(nw.sw, nw.se, sw.nw, sw.ne),
+                    self._join(nw.se, ne.sw, sw.ne, se.nw),
+                    self._join(ne.sw, ne.se, se.nw, se.ne),
+                ],
+                [sw, self._join(sw.ne, se.nw, sw.se, se.sw), se],
+            ]
+            if j == node.level - 2:
+                c = [[self._successor(n_ij, j - 1) for n_ij in row] for row in n]
+                result = self._join(
+                    *(
+                        self._successor(self._join(c[y][x], c[y][x + 1], c[y + 1][x], c[y + 1][x + 1]), j - 1)
+                        for y in (0, 1)
+                        for x in (0, 1)
+                    )
+                )
+            else:
+                c = [[self._successor(n_ij, j) for n_ij in row] for row in n]
+                result = self._join(
+                    *(
+                        self._join(c[y][x].se, c[y][x + 1].sw, c[y + 1][x].ne, c[y + 1][x + 1].nw)
+                        for y in (0, 1)
+                        for x in (0, 1)
+                    )
+                )
+        self._successors[key] = result
+        return result
+
+    def _life_4x4(self, node):
+        """Returns the center of a 4x4 node advanced one generation."""
+        nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+        rows = [
+            [nw.nw, nw.ne, ne.nw, ne.ne],
+            [nw.sw, nw.se, ne.sw, ne.se],
+            [sw.nw, sw.ne, se.nw, se.ne],
+            [sw.sw, sw.se, se.sw, se.se],
+        ]
+        cells = [[leaf.population for leaf in row] for row in rows]
+        leaves = []
+        for y in (1, 2):
+            for x in (1, 2):
+                count = sum(cells[y + dy][x + dx] for dy in (-1, 0, 1) for dx in (-1, 0, 1)) - cells[y][x]
+                leaves.append(self._leaves[int(self._table[cells[y][x], count])])
+        return self._join(*leaves)
+
+    def _raster(self, node, x, y, out, x0, y0):
+        size = 2**node.level
+        height, width = out.shape
+        if node.population == 0 or x >= x0 + width or y >= y0 + height or x + size <= x0 or y + size <= y0:
+            return
+        if node.level == 0:
+            out[y - y0, x - x0] = 1
+            return
+        half = size // 2
+        self._raster(node.nw, x, y, out, x0, y0)
+        self._raster(node.ne, x + half, y, out, x0, y0)
+        self._raster(node.sw, x, y + half, out, x0, y0)
+        self._raster(node.se, x + half, y + half, out, x0, y0)
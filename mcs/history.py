@@ -0,0 +1,212 @@
+import json
+
+import numpy as np
+
+
+class History:
+    """Retained frames of a state history.
+
+    A drop-in for the `~numpy.ndarray` of shape (max_step, ...) holding every state, indexed by step in the same
+    way, which keeps only the frames selected by the policy. The current and the previous states are always
+    double-buffered, so a model can read the current step and write the next one whatever is retained.
+
+    If `path` is given, the retained frames are stored in a `numpy.memmap` backed ``.npy`` file. Writes are
+    batched in memory and flushed every `block` frames, and :meth:`open` maps a flushed history back lazily.
+
+    Attributes:
+        max_step: The max step.
+        keep_last: If not `None`, only the last `keep_last` retained frames are kept in a ring buffer.
+        keep_every: Retains every `keep_every`-th frame.
+        keep_from: The first step, e.g. of a run resumed from a checkpoint; earlier steps are not stored.
+        path: The ``.npy`` file storing the frames, or `None` if kept in memory.
+        frames: An `~numpy.ndarray` of the retained frames, in slot order.
+    """
+
+    def __init__(
+        self,
+        max_step: int,
+        shape,
+        dtype=float,
+        *,
+        keep_last: int = None,
+        keep_every: int = 1,
+        keep_from: int = 0,
+        path: str = None,
+        block: int = 64,
+    ):
+        assert keep_every >= 1
+        assert keep_last is None or keep_last >= 1
+        assert path is None or keep_last is None
+        self.max_step = max_step
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self.keep_from = keep_from
+        self.path = path
+        n = -(-(max_step - keep_from) // keep_every)
+        n = n if keep_last is None else min(keep_last, n)
+        if path is None:
+            self.frames = np.zeros((n, *shape), dtype=dtype)
+            self._block = None
+        else:
+            self.frames = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n, *shape))
+            self._block = np.zeros((min(block, n), *shape), dtype=dtype)
+        self._block_slot = 0
+        self._head = np.zeros((2, *shape), dtype=dtype)
+        self._head_step = [-1, -1]
+        self._last = keep_from - 1
+
+    @classmethod
+    def open(cls, path: str) -> "History":
+        """Maps a history flushed to `path` read-only, without loading the frames."""
+        with open(cls._meta_path(path)) as file:
+            meta = json.load(file)
+        history = cls.__new__(cls)
+        history.max_step = meta["max_step"]
+        history.keep_last = None
+        history.keep_every = meta["keep_every"]
+        history.keep_from = meta.get("keep_from", 0)
+        history.path = path
+        history.frames = np.load(path, mmap_mode="r")
+        history._block = None
+        history._block_slot = 0
+        history._head = np.load(cls._head_path(path))
+        history._head_step = meta["head_step"]
+        history._last = meta["last"]
+        return history
+
+    def flush(self):
+        """Writes pending frames, the double-buffered states and metadata to disk."""
+        if self.path is None:
+            return
+        if self._block is not None:
+            self._write_block()
+            self.frames.flush()
+        np.save(self._head_path(self.path), self._head)
+        meta = {
+            "max_step": self.max_step,
+            "keep_every": self.keep_every,
+            "keep_from": self.keep_from,
+            "head_step": [int(step) for step in self._head_step],
+            "last": int(self._last),
+        }
+        with open(self._meta_path(self.path), "w") as file:
+            json.dump(meta, file)
+
+    @staticmethod
+    def _meta_path(path):
+        return f"{path[:-4] if path.endswith('.npy') else path}.json"
+
+    @staticmethod
+    def _head_path(path):
+        return f"{path[:-4] if path.endswith('.npy') else path}.head.npy"
+
+    @property
+    def shape(self):
+        return (self.max_step, *self.frames.shape[1:])
+
+    @property
+    def ndim(self):
+        return self.frames.ndim
+
+    @property
+    def dtype(self):
+        return self.frames.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes held by the retained frames and the buffers."""
+        return self.frames.nbytes + self._head.nbytes + (0 if self._block is None else self._block.nbytes)
+
+    @property
+    def steps(self) -> np.ndarray:
+        """The retained steps in order."""
+        return np.arange(self._oldest(), self._last + 1, self.keep_every)
+
+    def __len__(self):
+        return self.max_step
+
+    def __array__(self, dtype=None, copy=None):
+        frames = self[:]
+        return frames if dtype is None else frames.astype(dtype)
+
+    def retains(self, step: int) -> bool:
+        """Whether the frame of `step` itself, rather than of an earlier retained step, can still be read."""
+        if step in self._head_step:
+            return True
+        return self.keep_from <= step <= self._last and bool(self._retained(np.asarray(step)))
+
+    def _oldest(self):
+        if self.keep_last is None:
+            return self.keep_from
+        last = self._last - self.keep_from
+        return self.keep_from + max(0, last - last % self.keep_every - (self.keep_last - 1) * self.keep_every)
+
+    def _retained(self, steps):
+        return ((steps - self.keep_from) % self.keep_every == 0) & (steps >= self._oldest())
+
+    def _slot(self, step):
+        return (step - self.keep_from) // self.keep_every % len(self.frames)
+
+    def _write_block(self):
+        start = self._block_slot
+        end = min(start + len(self._block), len(self.frames))
+        self.frames[start:end] = self._block[: end - start]
+
+    def _read(self, slots):
+        frames = self.frames[slots]
+        if self._block is not None:
+            pending = (slots >= self._block_slot) & (slots < self._block_slot + len(self._block))
+            frames[pending] = self._block[slots[pending] - self._block_slot]
+        return frames
+
+    def _frame(self, step):
+        if step in self._head_step:
+            return self._head[self._head_step.index(step)]
+        if step > self._last:
+            return np.zeros_like(self._head[0])
+        step -= (step - self.keep_from) % self.keep_every
+        if not self._retained(step):
+            raise IndexError(f"step {step} is no longer retained")
+        slot = self._slot(step)
+        if self._block is not None and 0 <= slot - self._block_slot < len(self._block):
+            return self._block[slot - self._block_slot]
+        return self.frames[slot]
+
+    def _split(self, key):
+        step, rest = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if isinstance(step, (int, np.integer)) and step < 0:
+            step += self._last + 1
+        return step, rest
+
+    def __getitem__(self, key):
+        """Returns the frame of a step, or of the latest retained step before it; slices select retained steps."""
+        step, rest = self._split(key)
+        if isinstance(step, slice):
+            steps = np.arange(self._last + 1)[step]
+            frames = self._read(self._slot(steps[self._retained(steps)]))
+            if self._last in steps and not self._retained(self._last):
+                frames = np.concatenate([frames, self._frame(self._last)[None]])
+            return frames[(slice(None), *rest)]
+        return self._frame(step)[rest]
+
+    def __setitem__(self, key, value):
+        step, rest = self._split(key)
+        assert step >= self.keep_from
+        if step not in self._head_step:
+            i = self._head_step.index(min(self._head_step))
+            if rest:
+                self._head[i] = 0
+            self._head_step[i] = step
+        i = self._head_step.index(step)
+        self._head[(i, *rest)] = value
+        self._last = max(self._last, step)
+        if (step - self.keep_from) % self.keep_every == 0:
+            slot = self._slot(step)
+            if self._block is None:
+                self.frames[(slot, *rest)] = self._head[(i, *rest)]
+                return
+            if not 0 <= slot - self._block_slot < len(self._block):
+                self._write_block()
+                self._block[:] = 0
+                self._block_slot = slot
+            self._block[(slot - self._block_slot, *rest)] = self._head[(i, *rest)]
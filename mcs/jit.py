@@ -0,0 +1,203 @@
+import importlib.util
+from typing import Callable
+
+import numpy as np
+
+# Numba is imported when the first loop is compiled, so importing the package stays fast.
+_numba = importlib.util.find_spec("numba") is not None
+_kernels = {}
+
+
+def kernel(fn: Callable = None, *, kind: str = "cell", radius: int = 1, states: int = 2, backend: str = None):
+    """Compiles a kernel-style rule once, usable as a decorator.
+
+    The kinds of rules are:
+
+    - ``"cell"``: ``fn(neighborhood)`` returns the next state of a cell from the window of width ``2 * radius + 1``
+      around it, 1D or 2D, on a periodic domain.
+    - ``"map"``: ``fn(x)`` returns the next states, e.g. of :class:`DE` or a stepper of :class:`PDE`.
+    - ``"rhs"``: ``fn(x)`` returns the time derivative of the states, integrated by forward Euler.
+
+    With Numba, `fn` and the loop over the steps are compiled to machine code. Otherwise, a ``"cell"`` rule is
+    tabulated over all ``states ** width`` neighborhoods and applied as a lookup table, and the other kinds are
+    called as is, so they should be vectorized with NumPy. Kernels are cached by function, kind and radius, and
+    their compiled loops by dtype and dimensions.
+
+    Passed to :meth:`MCS.simulate`, e.g. ``ca.simulate(F=kernel(rule))``, the whole run executes in one call. The
+    kind must match the parameter, ``"cell"`` or ``"map"`` for `F` of :class:`CA`, ``"map"`` for `f` of
+    :class:`DE` and `G` of :class:`PDE`, and ``"rhs"`` for `f` of :class:`ODE` and `F` of :class:`PDE`, or a
+    `ValueError` is raised.
+
+    Args:
+        fn: The rule.
+        kind: ``"cell"``, ``"map"`` or ``"rhs"``.
+        radius: The number of neighbors on each side of a ``"cell"`` rule.
+        states: The number of states of a ``"cell"`` rule tabulated by the NumPy backend.
+        backend: ``"numba"`` or ``"numpy"``. If `None`, Numba if it is installed.
+    Returns:
+        A :class:`Kernel`.
+    """
+    if fn is None:
+        return lambda fn: kernel(fn, kind=kind, radius=radius, states=states, backend=backend)
+    backend = backend or ("numba" if _numba else "numpy")
+    key = fn, kind, radius, states, backend
+    if key not in _kernels:
+        _kernels[key] = Kernel(fn, kind, radius, states, backend)
+    return _kernels[key]
+
+
+class Kernel:
+    """A rule compiled by :func:`kernel`.
+
+    Calling it takes one step of a ``"cell"`` or ``"map"`` rule, or evaluates a ``"rhs"``, so it can also be passed
+    to :meth:`MCS.update`.
+
+    Attributes:
+        fn: The rule.
+        kind: ``"cell"``, ``"map"`` or ``"rhs"``.
+        radius: The number of neighbors on each side of a ``"cell"`` rule.
+        states: The number of states of a ``"cell"`` rule tabulated by the NumPy backend.
+        backend: ``"numba"`` or ``"numpy"``.
+    """
+
+    def __init__(self, fn: Callable, kind: str, radius: int, states: int, backend: str):
+        assert kind in ("cell", "map", "rhs")
+        assert backend in ("numba", "numpy")
+        assert backend == "numpy" or _numba
+        assert radius >= 1
+        self.fn = fn
+        self.kind = kind
+        self.radius = radius
+        self.states = states
+        self.backend = backend
+        self._compiled = {}
+
+    def __call__(self, config):
+        config = np.asarray(config)
+        if self.kind != "cell" or self.backend == "numpy":
+            return self._loop(config.dtype, config.ndim).fn(config)
+        frames = np.empty((2, *np.shape(config)), dtype=config.dtype)
+        frames[0] = config
+        self.run(frames, 0, 2)
+        return frames[1]
+
+    def run(self, frames: np.ndarray, start: int, stop: int, dt: float = None):
+        """Fills ``frames[start + 1:stop]`` by stepping from ``frames[start]``.
+
+        Args:
+            frames: An `~numpy.ndarray` of the states of every step, e.g. a history.
+            start: The step of the initial states.
+            stop: The step to stop before.
+            dt: The time step of a ``"rhs"``.
+        """
+        assert self.kind != "rhs" or dt is not None
+        loop = self._loop(frames.dtype, frames.ndim - 1)
+        if self.kind == "rhs":
+            loop.run(frames, start, stop, dt)
+        else:
+            loop.run(frames, start, stop)
+
+    def _loop(self, dtype, ndim):
+        """Returns the compiled loop of the dtype and dimensions of the states."""
+        key = np.dtype(dtype), ndim
+        if key not in self._compiled:
+            make = _numba_loop if self.backend == "numba" else _numpy_loop
+            self._compiled[key] = make(self, *key)
+        return self._compiled[key]
+
+
+class _Loop:
+    """A step function `fn` and a loop `run` over the steps."""
+
+    def __init__(self, fn, run):
+        self.fn = fn
+        self.run = run
+
+
+def _numpy_loop(k, dtype, ndim):
+    if k.kind == "rhs":
+
+        def run(frames, start, stop, dt):
+            for i in range(start, stop - 1):
+                frames[i + 1] = frames[i] + k.fn(frames[i]) * dt
+
+        return _Loop(k.fn, run)
+    step = k.fn if k.kind == "map" else _tabulate(k, dtype, ndim)
+
+    def run(frames, start, stop):
+        for i in range(start, stop - 1):
+            frames[i + 1] = step(frames[i])
+
+    return _Loop(step, run)
+
+
+def _tabulate(k, dtype, ndim):
+    """Tabulates a ``"cell"`` rule over all neighborhoods and returns a step applying the lookup table."""
+    assert ndim in (1, 2)
+    width = 2 * k.radius + 1
+    size = width**ndim
+    assert k.states**size <= 2**22, "too many neighborhoods to tabulate, install Numba"
+    digits = np.indices((k.states,) * size).reshape(size, -1)[::-1].T
+    table = np.array([k.fn(d.reshape((width,) * ndim).astype(dtype)) for d in digits], dtype=dtype)
+    offsets = np.indices((width,) * ndim).reshape(ndim, -1).T - k.radius
+    weights = k.states ** np.arange(size)
+
+    def step(config):
+        assert config.ndim == ndim
+        cells = config.astype(np.intp)
+        index = np.zeros_like(cells)
+        for offset, weight in zip(offsets, weights):
+            index += np.roll(cells, tuple(-offset), axis=tuple(range(ndim))) * weight
+        return table[index]
+
+    return step
+
+
+def _numba_loop(k, dtype, ndim):
+    import numba
+
+    fn = numba.njit(k.fn)
+    r = k.radius
+    w = 2 * r + 1
+    if k.kind == "map":
+
+        @numba.njit
+        def run(frames, start, stop):
+            for i in range(start, stop - 1):
+                frames[i + 1] = fn(frames[i])
+
+    elif k.kind == "rhs":
+
+        @numba.njit
+        def run(frames, start, stop, dt):
+            for i in range(start, stop - 1):
+                frames[i + 1] = frames[i] + fn(frames[i]) * dt
+
+    elif ndim == 1:
+
+        @numba.njit
+        def run(frames, start, stop):
+            n = frames.shape[1]
+            padded = np.empty(n + 2 * r, dtype=frames.dtype)
+            for i in range(start, stop - 1):
+                for x in range(n + 2 * r):
+                    padded[x] = frames[i, (x - r) % n]
+                for x in range(n):
+                    frames[i + 1, x] = fn(padded[x:][:w])
+
+    else:
+        assert ndim == 2
+
+        @numba.njit
+        def run(frames, start, stop):
+            ny, nx = frames.shape[1], frames.shape[2]
+            padded = np.empty((ny + 2 * r, nx + 2 * r), dtype=frames.dtype)
+            for i in range(start, stop - 1):
+                for y in range(ny + 2 * r):
+                    for x in range(nx + 2 * r):
+                        padded[y, x] = frames[i, (y - r) % ny, (x - r) % nx]
+                for y in range(ny):
+                    for x in range(nx):
+                        frames[i + 1, y, x] = fn(padded[y:, x:][:w, :w])
+
+    return _Loop(fn, run)
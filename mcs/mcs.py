@@ -1,24 +1,85 @@
+import functools
+import importlib
+import inspect
+import json
+import os
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Callable, List
+from typing import Callable, List, Union
 
-import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
-from scipy import signal
+
+from .history import History
+from .jit import Kernel
+from .profiling import Observer
+
+
+class _LazyModule:
+    """A module imported on first attribute access, so plotting and graph dependencies load only when used."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+plt = _LazyModule("matplotlib.pyplot")
+nx = _LazyModule("networkx")
+fft = _LazyModule("scipy.fft")
+signal = _LazyModule("scipy.signal")
+sparse = _LazyModule("scipy.sparse")
 
 
 class MCS(ABC):
     """Complex system simulation.
 
+    The state histories keep every step by default. Set `keep_last` and/or `keep_every` to retain fewer frames,
+    see :class:`History`, so memory scales with what is kept rather than with `max_step`. Set `storage` to a
+    directory to keep the histories on disk instead, one ``.npy`` file each.
+
+    :meth:`checkpoint` writes a compact snapshot of the current step, from which :meth:`resume` continues the run,
+    possibly past the original `max_step`, storing only the steps from the snapshot on.
+
     Attributes:
         max_step: The max step.
+        keep_last: If not `None`, keeps only the last `keep_last` retained frames in a ring buffer.
+        keep_every: Keeps every `keep_every`-th frame.
+        keep_from: The first step stored, e.g. of a resumed run.
+        storage: If not `None`, the directory storing the histories.
+        rng: The `numpy.random.Generator` owned by the model, reset from its seed by :meth:`initialize`, so
+            models never share random state.
         step: The current step.
     """
 
+    _histories = ()
+    # The kinds of :class:`Kernel` taken by each parameter of :meth:`update`, so both paths step them alike.
+    _kernel_kinds = {}
+
     @abstractmethod
-    def __init__(self, max_step: int):
+    def __init__(
+        self,
+        max_step: int,
+        *,
+        keep_last: int = None,
+        keep_every: int = 1,
+        keep_from: int = 0,
+        storage: str = None,
+    ):
         self.max_step = max_step
-        self.step = 0
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        self.keep_from = keep_from
+        self.storage = storage
+        self.rng = None
+        self.step = keep_from
+        if storage is not None:
+            os.makedirs(storage, exist_ok=True)
 
     @abstractmethod
     def initialize(self):
@@ -32,17 +93,270 @@ class MCS(ABC):
     def visualize(self):
         pass
 
-    def simulate(self, stop_step: int = None, **kwargs):
+    @property
+    def state(self) -> np.ndarray:
+        """The states of the current step."""
+        return getattr(self, self._histories[0])[self.step]
+
+    def simulate(
+        self,
+        stop_step: int = None,
+        *,
+        run: Callable = None,
+        block: int = None,
+        until: Callable = None,
+        observers: List[Observer] = (),
+        **kwargs,
+    ):
         """Simulates the system till `stop_step`.
 
+        The steps are advanced in blocks, by `run` if given, else by the fast path of the subclass, which defaults to
+        calling :meth:`update` once per step. If the only parameter is a :class:`Kernel`, it is used as `run`, so the
+        whole run executes in its compiled loop.
+
         Args:
             stop_step: If `None`, stops at :attr:`max_step`.
+            run: A function ``run(frames, start, stop)`` filling ``frames[start + 1:stop]`` of the first history by
+                stepping from ``frames[start]``, e.g. a vectorized or compiled loop such as :meth:`Kernel.run`.
+            block: The number of steps per block. If `None`, 1 if `until` is given, else all the steps at once.
+            until: A predicate of the model, e.g. a fixed point or synchronization being reached, checked after
+                every block to stop early, such as a :class:`mcs.detect.CycleDetector`.
+            observers: A list of :class:`Observer`, e.g. a :class:`Profiler`, called back during the run, which
+                stop it early if :meth:`Observer.on_step` returns `True`.
             **kwargs: Parameters passed to :meth:`update`.
         """
         stop_step = self.max_step if stop_step is None else stop_step
+        for observer in observers:
+            kwargs = observer.on_start(self, kwargs)
+        stepwise = [observer for observer in observers if type(observer).on_step is not Observer.on_step]
+        self._check_kernels(kwargs)
+        kernels = [value for value in kwargs.values() if isinstance(value, Kernel)]
+        if run is None and len(kwargs) == 1 and kernels:
+            run = self._kernel_run(kernels[0])
+            kwargs = kwargs if run is None else {}
+        block = 1 if stepwise else block or (1 if until is not None else max(1, stop_step))
+        block = min([block] + [observer.block for observer in observers if observer.block])
         while self.step < stop_step - 1:
+            start = self.step
+            stop = min(start + block, stop_step - 1) + 1
+            if run is None:
+                self._run(stop, **kwargs)
+            else:
+                self._run_frames(run, stop)
+            for observer in observers:
+                observer.on_block(self, start, self.step)
+            stopped = [observer.on_step(self) for observer in stepwise]
+            if any(stopped) or until is not None and until(self):
+                break
+        for observer in observers:
+            observer.on_finish(self)
+
+    def _run(self, stop, **kwargs):
+        """Advances till step `stop - 1`, the fast path of a subclass; by default calls :meth:`update` per step."""
+        while self.step < stop - 1:
             self.update(**kwargs)
 
+    def _run_frames(self, run, stop, chunk=1024):
+        """Advances till step `stop - 1` by a `run` hook, through a buffer of `chunk` frames if not a plain array."""
+        frames = getattr(self, self._histories[0])
+        if isinstance(frames, np.ndarray):
+            run(frames, self.step, stop)
+            self.step = max(self.step, stop - 1)
+            return
+        buffer = np.empty((min(chunk, stop - self.step), *frames.shape[1:]), dtype=frames.dtype)
+        while self.step < stop - 1:
+            n = min(len(buffer), stop - self.step)
+            buffer[0] = frames[self.step]
+            run(buffer, 0, n)
+            for i in range(1, n):
+                frames[self.step + i] = buffer[i]
+            self.step += n - 1
+
+    def flush(self):
+        """Writes the histories, the parameters and any further state of the subclass, e.g. the topology of
+        :class:`Net`, to :attr:`storage`, so the run can be reopened by :meth:`open`."""
+        assert self.storage is not None
+        histories = {name: value for name, value in vars(self).items() if isinstance(value, History)}
+        for history in histories.values():
+            history.flush()
+        np.savez(os.path.join(self.storage, "state.npz"), **self._state())
+        meta = {"params": self._params(), "step": self.step, "histories": list(histories)}
+        with open(os.path.join(self.storage, "meta.json"), "w") as file:
+            json.dump(meta, file, default=_encode)
+
+    @classmethod
+    def open(cls, storage: str):
+        """Reopens a run flushed to `storage`, mapping the histories lazily without loading them.
+
+        Args:
+            storage: The directory of the run.
+        Returns:
+            A model whose histories are read-only.
+        """
+        with open(os.path.join(storage, "meta.json")) as file:
+            meta = json.load(file, object_hook=_decode)
+        model = cls(**meta["params"], keep_last=1)
+        path = os.path.join(storage, "state.npz")
+        if os.path.exists(path):
+            with np.load(path) as state:
+                model._restore({name: state[name] for name in state.files})
+        model.keep_last = None
+        model.storage = storage
+        for name in meta["histories"]:
+            history = History.open(os.path.join(storage, f"{name}.npy"))
+            model.keep_every = history.keep_every
+            model.keep_from = history.keep_from
+            setattr(model, name, history)
+        model.step = meta["step"]
+        return model
+
+    def checkpoint(self, path: str):
+        """Writes a snapshot of the current step to a ``.npz`` file atomically, replacing any previous one.
+
+        The snapshot holds the current frame of every history, the step, the state of :attr:`rng`, the parameters
+        and any further state of the subclass, so a crash leaves either the old or the new snapshot intact.
+
+        Args:
+            path: The file of the snapshot.
+        """
+        rng = None if self.rng is None else self.rng.bit_generator.state
+        meta = {"params": self._params(), "step": self.step, "rng": rng}
+        arrays = {f"history.{name}": getattr(self, name)[self.step] for name in self._histories}
+        arrays.update({f"state.{name}": value for name, value in self._state().items()})
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as file:
+            np.savez(file, meta=json.dumps(meta, default=_encode), **arrays)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(file.name, path)
+
+    @classmethod
+    def resume(cls, path: str, max_step: int = None, **kwargs):
+        """Continues a run from a snapshot written by :meth:`checkpoint`.
+
+        The histories of the resumed model start at the step of the snapshot, so the steps before it are neither
+        recomputed nor copied.
+
+        Args:
+            path: The file of the snapshot.
+            max_step: If not `None`, overrides the max step, e.g. to extend the run.
+            **kwargs: The history policy of the resumed model, e.g. `keep_last` or a new `storage`, which must not
+                hold histories already, e.g. of the original run, as they would be overwritten.
+        Returns:
+            A model at the step of the snapshot, to :meth:`simulate` further.
+        """
+        storage = kwargs.get("storage")
+        if storage is not None:
+            for name in cls._histories:
+                if os.path.exists(os.path.join(storage, f"{name}.npy")):
+                    raise FileExistsError(f"{storage} already holds the history {name!r}, resume into a new storage")
+        with np.load(path) as snapshot:
+            meta = json.loads(str(snapshot["meta"]), object_hook=_decode)
+            arrays = {name: snapshot[name] for name in snapshot.files}
+        params = meta["params"]
+        if max_step is not None:
+            params["max_step"] = max_step
+        model = cls(**params, keep_from=meta["step"], **kwargs)
+        model._restore({name[6:]: value for name, value in arrays.items() if name.startswith("state.")})
+        for name in cls._histories:
+            getattr(model, name)[meta["step"]] = arrays[f"history.{name}"]
+        model.step = meta["step"]
+        if meta["rng"] is not None:
+            model.rng = np.random.Generator(getattr(np.random, meta["rng"]["bit_generator"])())
+            model.rng.bit_generator.state = meta["rng"]
+        return model
+
+    def repeat(self, period: int, stop_step: int = None):
+        """Fills the histories till `stop_step` by repeating the last `period` steps, e.g. of a detected cycle.
+
+        Raises a `ValueError` before filling anything if a history no longer retains one of these steps, e.g. with
+        `keep_every` or a `keep_last` shorter than the period, rather than repeating the wrong frames.
+
+        Args:
+            period: The number of steps repeated, which must still be retained.
+            stop_step: If `None`, fills till :attr:`max_step`.
+        """
+        stop_step = self.max_step if stop_step is None else stop_step
+        for name in self._histories:
+            frames = getattr(self, name)
+            if isinstance(frames, History):
+                for step in range(self.step - period + 1, self.step + 1):
+                    if not frames.retains(step):
+                        raise ValueError(
+                            f"cannot repeat a period of {period}, the history {name!r} does not retain step {step}"
+                        )
+        for name in self._histories:
+            frames = getattr(self, name)
+            cycle = [np.array(frames[step]) for step in range(self.step - period + 1, self.step + 1)]
+            for step in range(self.step + 1, stop_step):
+                frames[step] = cycle[(step - self.step - 1) % period]
+        self.step = max(self.step, stop_step - 1)
+
+    def trim(self):
+        """Shrinks the in-memory histories to the steps simulated, e.g. after stopping early, and :attr:`max_step`."""
+        for name in self._histories:
+            frames = getattr(self, name)
+            if isinstance(frames, np.ndarray):
+                setattr(self, name, frames[: self.step + 1].copy())
+        self.max_step = self.step + 1
+
+    def _reseed(self):
+        """Resets :attr:`rng` from the `seed` of the subclass."""
+        self.rng = np.random.default_rng(self.seed)
+
+    def _state(self) -> dict:
+        """Returns the arrays of further state needed to resume, e.g. of a subclass."""
+        return {}
+
+    def _restore(self, state: dict):
+        """Restores the state returned by :meth:`_state`."""
+
+    def _check_kernels(self, kwargs):
+        """Raises a `ValueError` if a parameter of :meth:`update` is a :class:`Kernel` of a kind it does not take,
+        e.g. a ``"map"`` as the derivative of an :class:`ODE`."""
+        for name, value in kwargs.items():
+            kinds = self._kernel_kinds.get(name, ())
+            if isinstance(value, Kernel) and value.kind not in kinds:
+                expected = " or ".join(repr(kind) for kind in kinds) or "no"
+                raise ValueError(f"{type(self).__name__} takes {expected} kernels as {name}, not {value.kind!r}")
+
+    def _kernel_run(self, kernel):
+        """Returns the `run` hook of a compiled kernel, or `None` if it cannot run the model."""
+        return kernel.run if kernel.kind != "rhs" else functools.partial(kernel.run, dt=self.dt)
+
+    def _params(self):
+        """Returns the arguments of the constructor of the subclass."""
+        params = inspect.signature(type(self).__init__).parameters.values()
+        return {p.name: getattr(self, p.name) for p in params if p.kind is p.POSITIONAL_OR_KEYWORD and p.name != "self"}
+
+    def _history(self, name, shape, dtype=float):
+        """Allocates the state history `name` of frames of `shape` according to the history policy."""
+        if self.keep_last is None and self.keep_every == 1 and self.keep_from == 0 and self.storage is None:
+            return np.zeros((self.max_step, *shape), dtype=dtype)
+        path = None if self.storage is None else os.path.join(self.storage, f"{name}.npy")
+        return History(
+            self.max_step,
+            shape,
+            dtype,
+            keep_last=self.keep_last,
+            keep_every=self.keep_every,
+            keep_from=self.keep_from,
+            path=path,
+        )
+
     @staticmethod
     def _identity(x):
         return x
+
+
+def _encode(value):
+    """Encodes the seed sequences spawned for parallel streams as JSON."""
+    if isinstance(value, np.random.SeedSequence):
+        return {"entropy": value.entropy, "spawn_key": list(value.spawn_key)}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if set(obj) == {"entropy", "spawn_key"}:
+        return np.random.SeedSequence(obj["entropy"], spawn_key=obj["spawn_key"])
+    return obj
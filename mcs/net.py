@@ -1,3 +1,5 @@
+import os
+
 from .mcs import *
 
 
@@ -6,23 +8,313 @@ class Net(MCS):
 
     Override this class to customize.
 
+    The topology is stored once as a sparse adjacency matrix, compiled into a sparse Laplacian matrix, and the node
+    states are stored in an array, so a step is a sparse matrix-vector product. Edges added or removed during a run
+    are logged and applied to the sparse matrices in a batch before the next step.
+
     Attributes:
         max_step: The max step.
-        graphs: A list of `networkx.Graph` objects.
+        seed: The seed of :attr:`rng`.
+        nodes: A sequence of the node labels, in the order of the states.
+        adjacency: A `scipy.sparse.csr_array` of the adjacency matrix of the current topology.
+        laplacian: A `scipy.sparse.csr_array` of the Laplacian matrix of the current topology.
+        events: A list of the edge events ``(step, "add" or "remove", u, v)``.
+        dense_nodes: The max number of nodes for which :meth:`spectrum` uses a dense eigendecomposition.
+        theta: An `~numpy.ndarray` of shape (max_step, number of nodes) representing the states.
         step: The current step.
     """
 
-    def __init__(self, max_step: int):
-        super().__init__(max_step)
-        self.graphs = []
+    _histories = ("theta",)
+    dense_nodes = 2000
+
+    def __init__(self, max_step: int, seed: int = 42, **kwargs):
+        super().__init__(max_step, **kwargs)
+        self.seed = seed
+        self.nodes = None
+        self.adjacency = None
+        self.events = []
+
+    def initialize(self, *, graph=None):
+        """Sets up the initial network and states.
+
+        Args:
+            graph: The topology, see :meth:`compile`, or a generator such as :meth:`erdos_renyi`, which is called
+                with :attr:`rng`. If `None`, Zachary's karate club.
+        """
+        self._reseed()
+        graph = nx.karate_club_graph() if graph is None else graph
+        self.compile(graph(self.rng) if callable(graph) else graph)
+        self.theta[0] = self.rng.random(len(self.nodes))
+
+    def compile(self, g):
+        """Compiles a topology into the sparse adjacency and Laplacian matrices and allocates the states.
+
+        Args:
+            g: A `networkx.Graph` object, the path of an edge list file with a pair of nodes per line,
+                a tuple (number of nodes, array of edges of shape (n_edges, 2)) as returned by the generators,
+                or a sparse adjacency matrix.
+        """
+        if isinstance(g, (str, os.PathLike)):
+            nodes, edges = self._read_edges(g)
+        elif isinstance(g, tuple):
+            nodes, edges = range(g[0]), np.asarray(g[1], dtype=np.intp).reshape(-1, 2)
+        elif sparse.issparse(g):
+            rows, cols = sparse.triu(g, k=1).nonzero()
+            nodes, edges = range(g.shape[0]), np.stack([rows, cols], axis=1)
+        else:
+            nodes = list(g.nodes)
+            index = {node: i for i, node in enumerate(nodes)}
+            edges = np.array([(index[u], index[v]) for u, v in g.edges], dtype=np.intp).reshape(-1, 2)
+        self.nodes = nodes
+        self._index = None
+        self._edges = edges
+        self.events = []
+        self._pending = {}
+        self.adjacency = self._adjacency(len(nodes), edges)
+        degree = np.asarray(self.adjacency.sum(axis=1)).ravel()
+        self.laplacian = sparse.csr_array(sparse.diags(degree) - self.adjacency)
+        self._topology_changed()
+        self.theta = self._history("theta", (len(nodes),))
+
+    def _topology_changed(self):
+        """Invalidates what is cached per topology."""
+        self._graph = None
+        self._layout = None
+        self._spectrum = {}
+
+    @staticmethod
+    def _adjacency(n, edges):
+        """Returns the symmetric adjacency matrix of edges, without duplicates and self-loops."""
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+        adjacency = sparse.csr_array((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+        adjacency.sum_duplicates()
+        adjacency.data[:] = 1
+        return adjacency
+
+    @staticmethod
+    def _read_edges(path):
+        """Reads an edge list file, returning the sorted node labels and the edges as indices."""
+        with open(path) as file:
+            rows = [line.split("#")[0].split()[:2] for line in file]
+        labels = np.array([row for row in rows if row], dtype=str).reshape(-1, 2)
+        try:
+            labels = labels.astype(np.int64)
+        except ValueError:
+            pass
+        nodes, index = np.unique(labels, return_inverse=True)
+        return nodes.tolist(), index.reshape(-1, 2)
+
+    @staticmethod
+    def erdos_renyi(n: int, p: float) -> Callable:
+        """Returns a generator of an Erdős-Rényi random graph :math:`G(n, p)` for :meth:`initialize`.
+
+        The number of edges is drawn first, then distinct node pairs by their index in the upper triangle, so the
+        cost scales with the edges rather than with :math:`n^2`.
+        """
+
+        def generate(rng):
+            pairs = n * (n - 1) // 2
+            k = rng.choice(pairs, size=rng.binomial(pairs, p), replace=False)
+            i = n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2 - 0.5).astype(np.int64)
+            j = k + i + 1 - pairs + (n - i) * (n - i - 1) // 2
+            return n, np.stack([i, j], axis=1)
+
+        return generate
+
+    @staticmethod
+    def barabasi_albert(n: int, m: int) -> Callable:
+        """Returns a generator of a Barabási-Albert preferential attachment graph for :meth:`initialize`.
+
+        Each new node attaches to `m` distinct nodes drawn with probability proportional to their degree, from an
+        array holding every node once per incident edge.
+        """
+        assert 1 <= m < n
+
+        def generate(rng):
+            edges = np.empty((m * (n - m), 2), dtype=np.int64)
+            ends = np.empty(2 * m * (n - m) + m, dtype=np.int64)
+            ends[:m] = np.arange(m)
+            filled = m
+            for node in range(m, n):
+                targets = set()
+                while len(targets) < m:
+                    targets.update(ends[rng.integers(filled, size=m - len(targets))].tolist())
+                row = (node - m) * m
+                block = edges[row:][:m]
+                block[:, 0] = node
+                block[:, 1] = sorted(targets)
+                tail = ends[filled:]
+                tail[:m] = block[:, 1]
+                tail[m:][:m] = node
+                filled += 2 * m
+            return n, edges
+
+        return generate
+
+    @staticmethod
+    def watts_strogatz(n: int, k: int, p: float) -> Callable:
+        """Returns a generator of a Watts-Strogatz small-world graph for :meth:`initialize`.
+
+        Every node is joined to its `k` nearest neighbors on a ring, and each edge is rewired to a random node with
+        probability `p`, vectorized over all edges. Rewired edges that become self-loops or duplicates are dropped.
+        """
+
+        def generate(rng):
+            i = np.repeat(np.arange(n), k // 2)
+            j = (i + np.tile(np.arange(1, k // 2 + 1), n)) % n
+            rewire = rng.random(len(j)) < p
+            j[rewire] = rng.integers(n, size=rewire.sum())
+            return n, np.stack([i, j], axis=1)
+
+        return generate
 
-    def initialize(self):
-        """Sets up the initial network."""
-        g = nx.karate_club_graph()
-        np.random.seed(42)
-        for i in g.nodes:
-            g.nodes[i]["state"] = np.random.random()
-        self.graphs.append(g)
+    def add_edge(self, u, v):
+        """Adds an edge before the next step, logging the event."""
+        self.events.append((self.step, "add", u, v))
+        self._pending[self._pair(u, v)] = 1
+
+    def remove_edge(self, u, v):
+        """Removes an edge before the next step, logging the event."""
+        self.events.append((self.step, "remove", u, v))
+        self._pending[self._pair(u, v)] = 0
+
+    def _pair(self, u, v):
+        if self._index is None and not isinstance(self.nodes, range):
+            self._index = {node: i for i, node in enumerate(self.nodes)}
+        i, j = (u, v) if self._index is None else (self._index[u], self._index[v])
+        assert i != j
+        return min(i, j), max(i, j)
+
+    def _apply_events(self):
+        """Applies the pending edge events to the sparse matrices as one incremental update."""
+        pairs = np.array(list(self._pending), dtype=np.intp).reshape(-1, 2)
+        target = np.array(list(self._pending.values()), dtype=float)
+        self._pending = {}
+        delta = target - np.asarray(self.adjacency[pairs[:, 0], pairs[:, 1]]).ravel()
+        changed = delta != 0
+        if not changed.any():
+            return
+        pairs, delta = pairs[changed], delta[changed]
+        n = len(self.nodes)
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        change = sparse.csr_array((np.concatenate([delta, delta]), (rows, cols)), shape=(n, n))
+        self.adjacency = self.adjacency + change
+        self.adjacency.eliminate_zeros()
+        degree = np.asarray(change.sum(axis=1)).ravel()
+        self.laplacian = sparse.csr_array(self.laplacian - change + sparse.diags(degree))
+        self.laplacian.eliminate_zeros()
+        self._topology_changed()
+
+    @property
+    def graph(self):
+        """A `networkx.Graph` object of the current topology, built on first access."""
+        if self._graph is None:
+            g = nx.Graph()
+            g.add_nodes_from(self.nodes)
+            rows, cols = sparse.triu(self.adjacency, k=1).nonzero()
+            nodes = np.array(list(self.nodes), dtype=object)
+            g.add_edges_from(zip(nodes[rows].tolist(), nodes[cols].tolist()))
+            self._graph = g
+        return self._graph
+
+    def _state(self):
+        if self._pending:
+            self._apply_events()
+        rows, cols = sparse.triu(self.adjacency, k=1).nonzero()
+        return {
+            "nodes": np.asarray(self.nodes),
+            "edges": np.stack([rows, cols], axis=1),
+            "initial_edges": self._edges,
+            "event_steps": np.array([event[0] for event in self.events], dtype=np.int64),
+            "event_adds": np.array([event[1] == "add" for event in self.events], dtype=bool),
+            "event_nodes": np.array([event[2:] for event in self.events]).reshape(-1, 2),
+        }
+
+    def _restore(self, state):
+        nodes = state["nodes"].tolist()
+        self.compile((len(nodes), state["edges"]))
+        if nodes != list(range(len(nodes))):
+            self.nodes = nodes
+        if "initial_edges" in state:
+            self._edges = state["initial_edges"]
+            kinds = np.where(state["event_adds"], "add", "remove").tolist()
+            events = zip(state["event_steps"].tolist(), kinds, *state["event_nodes"].T.tolist())
+            self.events = [tuple(event) for event in events]
+
+    def spectrum(self, k: int = None):
+        """Returns the smallest eigenvalues of the Laplacian matrix and their eigenvectors, cached per topology.
+
+        Graphs of up to :attr:`dense_nodes` nodes are decomposed densely. Larger graphs use sparse Lanczos iterations,
+        `scipy.sparse.linalg.eigsh`, for the `k` smallest eigenvalues only, which may miss repeated eigenvalues.
+
+        Args:
+            k: The number of eigenvalues. If `None`, all, which needs a dense decomposition.
+        Returns:
+            The ascending eigenvalues of shape (k,) and the eigenvectors as the columns of an array of shape (n, k).
+        """
+        if self._pending:
+            self._apply_events()
+        n = len(self.nodes)
+        k = n if k is None else min(k, n)
+        if n <= self.dense_nodes or k >= n - 1:
+            k, size = n, k
+        else:
+            size = k
+        if k not in self._spectrum:
+            if k == n:
+                self._spectrum[k] = np.linalg.eigh(self.laplacian.toarray())
+            else:
+                from scipy.sparse.linalg import eigsh
+
+                values, vectors = eigsh(self.laplacian, k=k, which="SA")
+                order = np.argsort(values)
+                self._spectrum[k] = values[order], vectors[:, order]
+        values, vectors = self._spectrum[k]
+        return values[:size], vectors[:, :size]
+
+    @property
+    def spectral_gap(self) -> float:
+        r"""The second smallest eigenvalue :math:`\lambda_2` of the Laplacian matrix, zero if disconnected."""
+        from scipy.sparse.csgraph import connected_components
+
+        if connected_components(self.adjacency, directed=False, return_labels=False) > 1:
+            return 0.0
+        return float(self.spectrum(2)[0][-1])
+
+    def synchronizes(self, a: float, b: float) -> bool:
+        r"""Predicts whether :meth:`coupled_oscillators` synchronize, i.e. :math:`b - a\lambda_2 < 0`."""
+        return b - a * self.spectral_gap < 0
+
+    def solve(self, t, a: float, b: float, dt: float = None, k: int = None) -> np.ndarray:
+        r"""Evaluates the linear :meth:`coupled_oscillators` from step 0 at any times, without stepping.
+
+        In the eigenbasis of the Laplacian matrix the modes decouple, so
+        :math:`\theta(t) = \sum_i e^{(b - a\lambda_i)t} v_i v_i^T \theta(0)`.
+
+        Args:
+            t: The times, a scalar or an array.
+            a: The coupling strength.
+            b: The growth rate.
+            dt: If given, the modes grow by the Euler factor :math:`(1 + (b - a\lambda_i)dt)^{t/dt}` instead, so
+                ``solve(step * dt, a, b, dt)`` matches :attr:`theta` at the step.
+            k: If given, only the `k` slowest modes are summed, an approximation for large graphs.
+        Returns:
+            An `~numpy.ndarray` of shape (*t.shape, number of nodes).
+        """
+        values, vectors = self.spectrum(k)
+        rate = b - a * values
+        t = np.asarray(t, dtype=float)[..., None]
+        growth = np.exp(rate * t) if dt is None else np.power(1 + rate * dt, np.rint(t / dt))
+        return (growth * (vectors.T @ self.theta[0])) @ vectors.T
+
+    def layout(self) -> dict:
+        """Returns the positions of the nodes for drawing, computed once per topology by `networkx.spring_layout`."""
+        if self._layout is None:
+            self._layout = nx.spring_layout(self.graph, seed=42)
+        return self._layout
 
     def update(self, **kwargs):
         """Updates the states in the next step."""
@@ -34,30 +326,54 @@ class Net(MCS):
         .. math::
             d\theta_i/dt = b\theta_i + a\sum_{j\in N_i}(\theta_j-\theta_i).
         """
-        g = self.graphs[-1]
-        g_next = g.copy()
-        for i in g.nodes:
-            theta_i = g.nodes[i]["state"]
-            sum_ni = sum(g.nodes[j]["state"] - theta_i for j in g.neighbors(i))
-            g_next.nodes[i]["state"] = theta_i + (b * theta_i + a * sum_ni) * dt
-        self.graphs.append(g_next)
+        if self._pending:
+            self._apply_events()
+        theta = self.theta[self.step]
         self.step += 1
+        self.theta[self.step] = theta + (b * theta - a * (self.laplacian @ theta)) * dt
+
+    def graph_at(self, step: int = -1):
+        """Rebuilds the network at a step with the states as the node attribute ``"state"``.
+
+        The topology is replayed from the initial edges and the events logged before the step, as an event logged
+        at a step applies from the next one.
+
+        Args:
+            step: The step.
+        Returns:
+            A `networkx.Graph` object.
+        """
+        step = step + self.step + 1 if step < 0 else step
+        nodes = list(self.nodes)
+        g = nx.Graph()
+        g.add_nodes_from(nodes)
+        g.add_edges_from((nodes[i], nodes[j]) for i, j in self._edges.tolist() if i != j)
+        for event_step, kind, u, v in self.events:
+            if event_step >= step:
+                break
+            if kind == "add":
+                g.add_edge(u, v)
+            elif g.has_edge(u, v):
+                g.remove_edge(u, v)
+        nx.set_node_attributes(g, dict(zip(nodes, self.theta[step].tolist())), "state")
+        return g
 
     def visualize(self, *, step: int = -1):
         """Visualizes the states of the network.
 
         Args:
-            step: The step to plot.
+            step: The step to plot, with the topology of that step.
         Returns:
             A `matplotlib.figure.Figure` object.
         """
-        g = self.graphs[step]
+        g = self.graph_at(step) if self.events else self.graph
         fig, ax = plt.subplots()
         nx.draw(
             g,
-            pos=nx.spring_layout(g, seed=42),
+            pos=self.layout(),
             ax=ax,
-            node_color=[np.sin(g.nodes[i]["state"]) for i in g.nodes],
+            nodelist=self.nodes,
+            node_color=np.sin(self.theta[step]),
             cmap=plt.cm.hsv,
             vmin=-1,
             vmax=1,
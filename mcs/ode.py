@@ -1,60 +1,199 @@
 from .mcs import *
 
 
+def _euler(f, x, dt):
+    return x + f(x) * dt
+
+
+def _rk4(f, x, dt):
+    k1 = f(x)
+    k2 = f(x + k1 * (dt / 2))
+    k3 = f(x + k2 * (dt / 2))
+    k4 = f(x + k3 * dt)
+    return x + (k1 + 2 * k2 + 2 * k3 + k4) * (dt / 6)
+
+
+def _leapfrog(f, x, dt):
+    n = x.shape[-1] // 2
+    x = np.array(x)
+    x[..., n:] += f(x)[..., n:] * (dt / 2)
+    x[..., :n] += f(x)[..., :n] * dt
+    x[..., n:] += f(x)[..., n:] * (dt / 2)
+    return x
+
+
+# Dormand-Prince 5(4) tableau.
+_DP_C = [0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1]
+_DP_A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+    [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+]
+_DP_E = [71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40]
+
+
 class ODE(MCS):
     """ODEs simulation.
 
+    The integration method is one of:
+
+    - ``"euler"``: Forward Euler.
+    - ``"rk4"``: The classic 4th order Runge-Kutta method.
+    - ``"rk45"``: Dormand-Prince 5(4) with adaptive step size, starting from `dt`; :attr:`t` records the steps taken.
+    - ``"leapfrog"``: Störmer-Verlet, symplectic for separable Hamiltonian systems whose states are
+      :math:`(q, p)`, the first and second halves of the variables.
+
+    Or a callable ``method(f, x, dt)`` returning the next states.
+
     Attributes:
         max_step: The max step.
         dim: The number of variables.
         dt: The time step.
-        x: An `~numpy.ndarray` representing the states of shape (max_step, dim).
+        method: The integration method.
+        rtol: Relative tolerance of ``"rk45"``.
+        atol: Absolute tolerance of ``"rk45"``.
+        dtype: The name of the floating-point type of the states, e.g. ``"float32"``. The times stay
+            `numpy.float64`.
+        batch: If not `None`, the number of systems simulated together as an ensemble.
+        x: An `~numpy.ndarray` representing the states of shape (max_step, dim), or (max_step, batch, dim).
         t: An `~numpy.ndarray` of length max_step representing time.
         step: The current step.
     """
 
-    def __init__(self, max_step: int, dim: int, dt: float):
-        super().__init__(max_step)
+    _histories = ("x", "t")
+    _kernel_kinds = {"f": ("rhs",)}
+
+    methods = {"euler": _euler, "rk4": _rk4, "leapfrog": _leapfrog}
+
+    def __init__(
+        self,
+        max_step: int,
+        dim: int,
+        dt: float,
+        batch: int = None,
+        method: Union[str, Callable] = "euler",
+        rtol: float = 1e-6,
+        atol: float = 1e-9,
+        dtype=float,
+        **kwargs,
+    ):
+        super().__init__(max_step, **kwargs)
         self.dim = dim
+        self.batch = batch
         self.dt = dt
-        self.x = np.zeros((max_step, dim))
-        self.t = np.zeros(max_step)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self._h = dt
+        self.dtype = np.dtype(dtype).name
+        self.x = self._history("x", (dim,) if batch is None else (batch, dim), self.dtype)
+        self.t = self._history("t", ())
 
     def initialize(self, *, x0: List[float] = None):
         """Sets up the initial values for the state variables.
 
         Args:
-            x0: A list of initial states.
+            x0: A list of initial states, or an array of shape (batch, dim) for an ensemble.
+                A single list is broadcast to every member of the ensemble.
         """
         if x0 is None:
-            x0 = [0] * len(self.dim)
-        assert len(x0) == self.dim
-        self.x[0] = x0
+            x0 = [0] * self.dim
+        assert np.shape(x0)[-1] == self.dim
+        self.x[0] = np.broadcast_to(x0, self.x[0].shape)
         self.t[0] = 0
 
     def update(self, *, f: Callable = None):
         """Updates the states in the next step.
 
         Args:
-            f: A function, :math:`dx/dt = f(x)`.
+            f: A function, :math:`dx/dt = f(x)`, applied to the whole ensemble at once.
         """
+        self._check_kernels({"f": f})
         if f is None:
             f = self._identity
         x = self.x[self.step]
-        dxdt = f(x)
+        if self.method == "rk45":
+            x_next, dt = self._rk45(f, x)
+        else:
+            method = self.methods[self.method] if isinstance(self.method, str) else self.method
+            x_next, dt = method(f, x, self.dt), self.dt
         self.step += 1
-        self.x[self.step] = x + dxdt * self.dt
-        self.t[self.step] = self.t[self.step - 1] + self.dt
+        self.x[self.step] = x_next
+        self.t[self.step] = self.t[self.step - 1] + dt
+
+    def _state(self):
+        return {"h": np.asarray(self._h)}
+
+    def _restore(self, state):
+        self._h = float(state["h"])
+
+    def _kernel_run(self, kernel):
+        """Returns the `run` hook of a compiled right-hand side if integrated by forward Euler."""
+        return super()._kernel_run(kernel) if self.method == "euler" else None
+
+    def _run_frames(self, run, stop):
+        """Advances by a `run` hook and fills in :attr:`t` with steps of `dt`."""
+        start, t = self.step, self.t[self.step]
+        super()._run_frames(run, stop)
+        for step in range(start + 1, self.step + 1):
+            self.t[step] = t + self.dt * (step - start)
+
+    def repeat(self, period, stop_step=None):
+        """Repeats the last `period` states and fills in :attr:`t` with steps of `dt`."""
+        start, t = self.step, self.t[self.step]
+        super().repeat(period, stop_step)
+        for step in range(start + 1, self.step + 1):
+            self.t[step] = t + self.dt * (step - start)
+
+    def _rk45(self, f, x):
+        """Takes one accepted Dormand-Prince step, returning the next states and the step size used."""
+        while True:
+            h = self._h
+            k = []
+            for a in _DP_A:
+                k.append(f(x + sum(a_j * k_j for a_j, k_j in zip(a, k)) * h) if a else f(x))
+            x_next = x + sum(a_j * k_j for a_j, k_j in zip(_DP_A[-1], k)) * h
+            error = sum(e_j * k_j for e_j, k_j in zip(_DP_E, k)) * h
+            scale = self.atol + self.rtol * np.maximum(np.abs(x), np.abs(x_next))
+            norm = np.sqrt(np.mean((error / scale) ** 2))
+            self._h = h * (min(5, max(0.2, 0.9 * norm**-0.2)) if norm > 0 else 5)
+            if norm <= 1:
+                return x_next, h
+
+    def dense(self, t, *, f: Callable):
+        """Evaluates the states at arbitrary times within the simulated range by cubic Hermite interpolation.
+
+        Args:
+            t: An array of times.
+            f: The function passed to :meth:`update`.
+        Returns:
+            An `~numpy.ndarray` of the states at `t`.
+        """
+        ts, xs = np.asarray(self.t[: self.step + 1]), np.asarray(self.x[: self.step + 1])
+        i = np.clip(np.searchsorted(ts, t, side="right") - 1, 0, len(ts) - 2)
+        h = ts[i + 1] - ts[i]
+        s = ((np.asarray(t) - ts[i]) / h).reshape((-1,) + (1,) * (xs.ndim - 1))
+        h = h.reshape(s.shape)
+        x0, x1 = xs[i], xs[i + 1]
+        h00, h10, h01, h11 = 2 * s**3 - 3 * s**2 + 1, s**3 - 2 * s**2 + s, 3 * s**2 - 2 * s**3, s**3 - s**2
+        return h00 * x0 + h10 * h * f(x0) + h01 * x1 + h11 * h * f(x1)
 
     @staticmethod
     def lv(a, b, c, d):
-        """Returns Lotka-Volterra equations."""
+        """Returns Lotka-Volterra equations.
+
+        The parameters may be arrays broadcastable to the batch, to sweep them over an ensemble.
+        """
 
         def dxdt(states):
-            x, y = states
+            x, y = np.moveaxis(states, -1, 0)
             dx = a * x - b * x * y
             dy = d * x * y - c * y
-            return np.array([dx, dy])
+            return np.stack([dx, dy], axis=-1)
 
         return dxdt
 
@@ -71,5 +210,5 @@ class ODE(MCS):
         fig, ax = plt.subplots()
         indices = np.arange(self.dim) if indices is None else indices
         for state in indices:
-            ax.plot(self.t[:step], self.x[:step, state])
+            ax.plot(self.t[:step], self.x[:step, ..., state])
         return fig
@@ -12,37 +12,64 @@ class PDE(MCS):
         dt: The time step.
         dh: Spatial resolution.
         size: Size of grid.
-        f: An `~numpy.ndarray` of shape (max_step, size, size, dim) representing the states.
+        layout: ``"aos"`` to store the variables of a point together, or ``"soa"`` to store each variable as a
+            contiguous field, as :meth:`turing_fused` expects.
+        seed: The seed of :attr:`rng`.
+        dtype: The name of the floating-point type of the states, e.g. ``"float32"`` for half the memory and
+            bandwidth of the default ``"float64"``.
+        f: An `~numpy.ndarray` of shape (max_step, size, size, dim), or (max_step, dim, size, size) if the layout is
+            ``"soa"``, representing the states.
         step: The current step.
     """
 
-    def __init__(self, max_step: int, dim: int, dt: float, dh: float, size: int):
-        super().__init__(max_step)
+    _histories = ("f",)
+    _kernel_kinds = {"F": ("rhs",), "G": ("map",)}
+
+    def __init__(
+        self,
+        max_step: int,
+        dim: int,
+        dt: float,
+        dh: float,
+        size: int,
+        layout: str = "aos",
+        seed: int = 42,
+        dtype=float,
+        **kwargs,
+    ):
+        super().__init__(max_step, **kwargs)
+        assert layout in ("aos", "soa")
         self.dim = dim
         self.dt = dt
         self.dh = dh
         self.size = size
-        self.f = np.zeros((max_step, size, size, dim))
+        self.layout = layout
+        self.seed = seed
+        self.dtype = np.dtype(dtype).name
+        self.f = self._history("f", (size, size, dim) if layout == "aos" else (dim, size, size), self.dtype)
+        x = y = np.arange(0, dh * (size + 1), dh)
+        self.xv, self.yv = np.meshgrid(x, y)
 
     def initialize(self):
         """Sets up the initial conditions."""
-        x = y = np.arange(0, self.dh * (self.size + 1), self.dh)
-        self.xv, self.yv = np.meshgrid(x, y)
-        np.random.seed(42)
-        self.f[0, ..., 0] = 1 + np.random.uniform(-0.01, 0.01, (self.size, self.size))
-        self.f[0, ..., 1] = 1 + np.random.uniform(-0.01, 0.01, (self.size, self.size))
+        self._reseed()
+        self.f[self._field(0, 0)] = 1 + self.rng.uniform(-0.01, 0.01, (self.size, self.size))
+        self.f[self._field(0, 1)] = 1 + self.rng.uniform(-0.01, 0.01, (self.size, self.size))
 
-    def update(self, *, F: Callable = None):
+    def update(self, *, F: Callable = None, G: Callable = None):
         r"""Updates the states in the next step.
 
         Args:
-            F: A state transition function corresponding to :math:`\partial f/\partial t = F(f,...,x,y,t)`.
+            F: A state transition function corresponding to :math:`\partial f/\partial t = F(f,...,x,y,t)`,
+                integrated by forward Euler.
+            G: A stepper returning the states of the next step, e.g. :meth:`turing_spectral`. Overrides `F`.
         """
+        self._check_kernels({"F": F, "G": G})
         if F is None:
             F = self._identity
         config = self.f[self.step]
         self.step += 1
-        self.f[self.step] = config + F(config) * self.dt
+        self.f[self.step] = config + F(config) * self.dt if G is None else G(config)
 
     @staticmethod
     def turing(a, b, c, d, h, k, Du, Dv, dh):
@@ -52,7 +79,10 @@ class PDE(MCS):
             \partial u/\partial t = a(u-h) + b(v-k) + D_u \Delta u
 
             \partial v/\partial t = c(u-h) + d(v-k) + D_v \Delta v.
+
+        The parameters are Python floats, so the states keep their precision, e.g. `numpy.float32`.
         """
+        a, b, c, d, h, k, Du, Dv, dh = map(float, (a, b, c, d, h, k, Du, Dv, dh))
 
         def dfdt(config):
             lap = PDE._laplacian(config, dh)
@@ -64,6 +94,105 @@ class PDE(MCS):
 
         return dfdt
 
+    @staticmethod
+    def turing_spectral(a, b, c, d, h, k, Du, Dv, dh, dt, size, scheme="imex"):
+        r"""Returns a pseudo-spectral stepper of the reaction-diffusion equations of :meth:`turing` on a periodic domain.
+
+        Diffusion is solved exactly in Fourier space and the reaction explicitly, so `dt` is not limited by the
+        diffusion stability condition. The wavenumbers are precomputed once.
+
+        Args:
+            dt: The time step.
+            size: Size of grid.
+            scheme: ``"imex"`` for semi-implicit Euler, or ``"etd"`` for first order exponential time differencing.
+        Returns:
+            A stepper to pass as `G` to :meth:`update`.
+        """
+        a, b, c, d, h, k = map(float, (a, b, c, d, h, k))
+        ky = 2 * np.pi * fft.fftfreq(size, d=dh)
+        kx = 2 * np.pi * fft.rfftfreq(size, d=dh)
+        k2 = (ky[:, None] ** 2 + kx[None, :] ** 2)[..., None]
+        L = -k2 * np.array([Du, Dv])
+        assert scheme in ("imex", "etd")
+        if scheme == "imex":
+            E, Q = 1 / (1 - L * dt), dt / (1 - L * dt)
+        else:
+            E = np.exp(L * dt)
+            Q = np.full_like(L, dt)
+            np.divide(E - 1, L, out=Q, where=L != 0)
+        coefficients = {}
+
+        def step(config):
+            if config.dtype not in coefficients:
+                coefficients[config.dtype] = E.astype(config.dtype), Q.astype(config.dtype)
+            E_, Q_ = coefficients[config.dtype]
+            u, v = np.moveaxis(config, -1, 0)
+            reaction = np.stack([a * (u - h) + b * (v - k), c * (u - h) + d * (v - k)], axis=2)
+            f_hat = E_ * fft.rfft2(config, axes=(0, 1)) + Q_ * fft.rfft2(reaction, axes=(0, 1))
+            return fft.irfft2(f_hat, s=(size, size), axes=(0, 1))
+
+        return step
+
+    @staticmethod
+    def turing_fused(a, b, c, d, h, k, Du, Dv, dh, dt):
+        """Returns a fused stepper of the reaction-diffusion equations of :meth:`turing` for the ``"soa"`` layout.
+
+        The Laplacian and the reaction terms are written into preallocated work buffers with slice views and `out=`
+        arguments, and the stepper ping-pongs between two output buffers, so a step allocates nothing. The returned
+        array is reused two calls later.
+
+        Args:
+            dt: The time step.
+        Returns:
+            A stepper to pass as `G` to :meth:`update`.
+        """
+        a, b, c, d, h, k, Du, Dv, dh, dt = map(float, (a, b, c, d, h, k, Du, Dv, dh, dt))
+        buffers = {}
+
+        def step(config):
+            assert config.shape[0] == 2
+            if config.shape not in buffers:
+                buffers[config.shape] = (
+                    np.empty((3, *config.shape), dtype=config.dtype),
+                    np.empty(config.shape[1:], dtype=config.dtype),
+                    [0],
+                )
+            (lap, out_0, out_1), tmp, parity = buffers[config.shape]
+            out = out_0 if parity[0] == 0 else out_1
+            parity[0] ^= 1
+            PDE._laplacian_into(config, dh, lap)
+            u, v = config
+            for i, (p, q, D) in enumerate([(a, b, Du), (c, d, Dv)]):
+                np.multiply(lap[i], D * dt, out=out[i])
+                np.multiply(u, p * dt, out=tmp)
+                out[i] += tmp
+                np.multiply(v, q * dt, out=tmp)
+                out[i] += tmp
+                out[i] += config[i]
+                out[i] -= (p * h + q * k) * dt
+            return out
+
+        return step
+
+    @staticmethod
+    def _laplacian_into(u, dh, out):
+        """Writes the Laplacian over the last two axes of `u` into `out` using slice views only."""
+        np.multiply(u, -4, out=out)
+        out[..., 1:, :] += u[..., :-1, :]
+        out[..., :1, :] += u[..., -1:, :]
+        out[..., :-1, :] += u[..., 1:, :]
+        out[..., -1:, :] += u[..., :1, :]
+        out[..., 1:] += u[..., :-1]
+        out[..., :1] += u[..., -1:]
+        out[..., :-1] += u[..., 1:]
+        out[..., -1:] += u[..., :1]
+        out *= 1 / dh**2
+        return out
+
+    def _field(self, step, i):
+        """Returns the index of the `i`-th variable at `step` in :attr:`f`."""
+        return (step, ..., i) if self.layout == "aos" else (step, i)
+
     @staticmethod
     def _laplacian(u, dh):
         assert u.ndim == 3
@@ -87,7 +216,7 @@ class PDE(MCS):
         indices = np.arange(self.dim) if indices is None else indices
         for state in indices:
             fig, ax = plt.subplots()
-            pcm = ax.pcolormesh(self.xv, self.yv, self.f[step, ..., state], vmin=0, vmax=2)
+            pcm = ax.pcolormesh(self.xv, self.yv, self.f[self._field(step, state)], vmin=0, vmax=2)
             ax.set_aspect("equal")
             fig.colorbar(pcm, ax=ax)
             figs.append(fig)
@@ -0,0 +1,129 @@
+import functools
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from .jit import Kernel
+
+
+def _reset_peak():
+    """Resets the peak of the traced memory, by restarting the tracing before Python 3.9 lacking `reset_peak`."""
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.stop()
+        tracemalloc.start()
+
+
+class Observer:
+    """Callbacks of :meth:`MCS.simulate`, passed as `observers`.
+
+    Override any of the methods. If :meth:`on_step` is overridden, the simulation advances one step per block, so
+    only observers that need every step slow it down.
+
+    Attributes:
+        block: If not `None`, the max number of steps per block.
+    """
+
+    block = None
+
+    def on_start(self, model, kwargs: dict) -> dict:
+        """Called before the run with the parameters of :meth:`MCS.update`, returning the parameters to use."""
+        return kwargs
+
+    def on_step(self, model) -> bool:
+        """Called after every step, returning `True` to stop the run."""
+
+    def on_block(self, model, start: int, stop: int):
+        """Called after a block of steps advancing from step `start` to step `stop`."""
+
+    def on_finish(self, model):
+        """Called after the run."""
+
+
+class Profiler(Observer):
+    """Instrumentation of a run of :meth:`MCS.simulate`.
+
+    Times every block, so pass ``block=1`` for per-step timing, and the state transition functions passed to
+    :meth:`MCS.update`, so the time spent in the rule is told apart from stepping and storage.
+
+    Attributes:
+        memory: Whether to trace the bytes allocated during the run with `tracemalloc`.
+        times: The seconds taken by every block of the last run.
+        rule_seconds: The seconds spent in the state transition functions in the last run.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.times = []
+        self.rule_seconds = 0.0
+        self._summary = {}
+
+    def timed(self, fn: Callable) -> Callable:
+        """Wraps a function to add the time spent in it to :attr:`rule_seconds`."""
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.rule_seconds += time.perf_counter() - start
+
+        return wrapper
+
+    def on_start(self, model, kwargs):
+        self.times = []
+        self.rule_seconds = 0.0
+        self._step = model.step
+        self._tracing = self.memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        if self.memory:
+            _reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._start = self._last = time.perf_counter()
+        return {k: self.timed(v) if callable(v) and not isinstance(v, Kernel) else v for k, v in kwargs.items()}
+
+    def on_block(self, model, start, stop):
+        now = time.perf_counter()
+        self.times.append(now - self._last)
+        self._last = now
+
+    def on_finish(self, model):
+        seconds = time.perf_counter() - self._start
+        steps = model.step - self._step
+        times = np.array(self.times)
+        self._summary = {
+            "model": type(model).__name__,
+            "steps": steps,
+            "seconds": seconds,
+            "steps_per_second": steps / seconds if seconds > 0 else float("inf"),
+            "rule_seconds": self.rule_seconds,
+            "other_seconds": seconds - self.rule_seconds,
+            "blocks": len(times),
+            "block_seconds_mean": float(times.mean()) if len(times) else 0.0,
+            "block_seconds_max": float(times.max()) if len(times) else 0.0,
+            "state_bytes": sum(getattr(model, name).nbytes for name in model._histories),
+        }
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self._summary["allocated_bytes"] = current - self._traced
+            self._summary["peak_allocated_bytes"] = peak - self._traced
+            if self._tracing:
+                tracemalloc.stop()
+
+    def summary(self) -> dict:
+        """Returns the statistics of the last run."""
+        return dict(self._summary)
+
+    def to_json(self, path: str = None) -> str:
+        """Returns the statistics of the last run as JSON, also written to `path` if given."""
+        text = json.dumps(self._summary, indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(text)
+        return text
@@ -0,0 +1,175 @@
+from .ca import CA
+from .de import DE
+from .hashlife import HashLife
+from .mcs import *
+from .net import Net
+from .ode import ODE
+from .pde import PDE
+
+
+def decimate(x, y, max_points: int):
+    """Reduces a series to at most about `max_points` points, keeping the min and max of every bucket.
+
+    Unlike striding, the extremes of fast oscillations survive, so the decimated plot looks like the full one.
+
+    Args:
+        x: The abscissas of shape (n,).
+        y: The ordinates of shape (n,).
+        max_points: The max number of points.
+    Returns:
+        The decimated `x` and `y`.
+    """
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    pad = buckets * size - n
+    values = np.concatenate([y, np.repeat(y[-1:], pad)]).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    index = np.sort(np.concatenate([offsets + values.argmin(axis=1), offsets + values.argmax(axis=1)]))
+    index = np.unique(np.minimum(index, n - 1))
+    return x[index], y[index]
+
+
+class Renderer:
+    """Cached rendering of a model for scrubbing through steps and exporting animations.
+
+    The figure, its artists and the layout of a network are built once, and :meth:`draw` only updates their data
+    with `set_data` or `set_array`. Long time series of :class:`ODE` and :class:`DE` are decimated, see
+    :func:`decimate`.
+
+    Attributes:
+        model: A simulated :class:`CA`, :class:`HashLife`, :class:`PDE`, :class:`ODE`, :class:`DE` or :class:`Net`.
+        indices: A list of indices of the states to plot. If `None`, plot all states.
+        max_points: The max number of points per line of a time series.
+        fig: The cached `matplotlib.figure.Figure` object.
+    """
+
+    def __init__(self, model, indices=None, max_points: int = 2000):
+        self.model = model
+        self.indices = indices
+        self.max_points = max_points
+        self.fig = None
+        self._artists = None
+
+    def draw(self, step: int = -1):
+        """Updates the figure to a step, building it on the first call.
+
+        Args:
+            step: The step to plot, negative steps counting back from the current step.
+        Returns:
+            The `matplotlib.figure.Figure` object.
+        """
+        step = step + self.model.step + 1 if step < 0 else step
+        if self.fig is None:
+            self.fig, self._artists = self._build()
+        self._update(step)
+        return self.fig
+
+    def animate(self, path: str, steps=None, fps: int = 20, dpi: int = 100, writer=None):
+        """Exports an animation by streaming one frame per step through a writer, reusing the figure.
+
+        Args:
+            path: The output file, ``.gif`` for `matplotlib.animation.PillowWriter`, otherwise
+                `matplotlib.animation.FFMpegWriter`, e.g. ``.mp4``.
+            steps: The steps to render. If `None`, every step simulated.
+            fps: Frames per second.
+            dpi: Resolution of the frames.
+            writer: A `matplotlib.animation.AbstractMovieWriter` overriding the choice by extension.
+        """
+        from matplotlib import animation
+
+        if writer is None:
+            writer = animation.PillowWriter(fps=fps) if path.endswith(".gif") else animation.FFMpegWriter(fps=fps)
+        steps = range(self.model.step + 1) if steps is None else steps
+        self.draw(steps[0])
+        with writer.saving(self.fig, path, dpi):
+            for step in steps:
+                self.draw(step)
+                writer.grab_frame()
+
+    def close(self):
+        """Closes the cached figure."""
+        if self.fig is not None:
+            plt.close(self.fig)
+            self.fig = None
+
+    def _indices(self, dim):
+        return list(range(dim)) if self.indices is None else list(self.indices)
+
+    def _build(self):
+        m = self.model
+        if isinstance(m, HashLife):
+            fig, ax = plt.subplots()
+            return fig, ax.imshow(m.raster(), cmap=plt.cm.binary, vmin=0, vmax=1)
+        if isinstance(m, CA):
+            fig, ax = plt.subplots()
+            if m.s.ndim == 3:
+                return fig, ax.imshow(np.asarray(m.s[0]), cmap=plt.cm.binary, vmin=0, vmax=1)
+            rows = m.unpack(m.s[:], m.size_x) if m.packed else np.asarray(m.s[:])
+            frame = np.zeros_like(rows)
+            return fig, (ax.imshow(frame, cmap=plt.cm.binary, vmin=0, vmax=1), rows, frame)
+        if isinstance(m, PDE):
+            indices = self._indices(m.dim)
+            fig, axes = plt.subplots(1, len(indices), squeeze=False, figsize=(6.4 * len(indices), 4.8))
+            meshes = []
+            for ax, state in zip(axes[0], indices):
+                mesh = ax.pcolormesh(m.xv, m.yv, m.f[m._field(0, state)], vmin=0, vmax=2)
+                ax.set_aspect("equal")
+                fig.colorbar(mesh, ax=ax)
+                meshes.append((mesh, state))
+            return fig, meshes
+        if isinstance(m, (ODE, DE)):
+            fig, ax = plt.subplots()
+            lines = []
+            for state in self._indices(m.dim):
+                columns = int(np.prod(m.x.shape[1:-1], dtype=int))
+                for column in range(columns):
+                    (line,) = ax.plot([], [])
+                    lines.append((line, state, column))
+            return fig, lines
+        if isinstance(m, Net):
+            fig, ax = plt.subplots()
+            pos = m.layout()
+            edges = nx.draw_networkx_edges(m.graph, pos, ax=ax)
+            nodes = nx.draw_networkx_nodes(
+                m.graph, pos, nodelist=m.nodes, node_color=np.sin(m.theta[0]), cmap=plt.cm.hsv, vmin=-1, vmax=1, ax=ax
+            )
+            ax.set_axis_off()
+            return fig, (nodes, edges)
+        raise TypeError(f"cannot render {type(m).__name__}")
+
+    def _update(self, step):
+        m = self.model
+        if isinstance(m, HashLife):
+            assert step == m.step
+            self._artists.set_data(m.raster())
+        elif isinstance(m, CA):
+            if m.s.ndim == 3:
+                self._artists.set_data(m.s[step])
+            else:
+                image, rows, frame = self._artists
+                frame[:step] = rows[:step]
+                frame[step:] = 0
+                image.set_data(frame)
+        elif isinstance(m, PDE):
+            for mesh, state in self._artists:
+                mesh.set_array(np.asarray(m.f[m._field(step, state)]).ravel())
+        elif isinstance(m, (ODE, DE)):
+            x = np.asarray(m.x[:step])
+            x = x.reshape(len(x), int(np.prod(m.x.shape[1:-1], dtype=int)), m.dim)
+            t = np.asarray(m.t[:step]) if isinstance(m, ODE) else np.arange(len(x))
+            for line, state, column in self._artists:
+                line.set_data(*decimate(t, x[:, column, state], self.max_points))
+            ax = self.fig.axes[0]
+            ax.relim()
+            ax.autoscale_view()
+        elif isinstance(m, Net):
+            nodes, edges = self._artists
+            if m.events:
+                edges.remove()
+                edges = nx.draw_networkx_edges(m.graph_at(step), m.layout(), ax=self.fig.axes[0])
+                edges.set_zorder(nodes.get_zorder() - 1)
+                self._artists = nodes, edges
+            nodes.set_array(np.sin(m.theta[step]))
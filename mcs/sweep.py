@@ -0,0 +1,156 @@
+import concurrent.futures
+import itertools
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Tuple, Type
+
+import numpy as np
+
+from .mcs import MCS
+
+
+def final_state(model: MCS) -> np.ndarray:
+    """Returns the states of the last step, the default reducer of :func:`sweep`."""
+    return np.asarray(model.state)
+
+
+def product(
+    init: Dict[str, list] = None,
+    initialize: Dict[str, list] = None,
+    simulate: Dict[str, list] = None,
+    rule: Tuple[str, Dict[str, list]] = None,
+    seeds: list = None,
+) -> List[dict]:
+    """Returns the tasks of all combinations of the values listed for each argument.
+
+    Args:
+        init: Lists of values of the constructor arguments.
+        initialize: Lists of values of the arguments of :meth:`MCS.initialize`.
+        simulate: Lists of values of the arguments of :meth:`MCS.simulate`, i.e. of :meth:`MCS.update`.
+        rule: A tuple of the name of a static rule of the model, e.g. ``"lv"``, and lists of values of its arguments.
+            The rule is built in the worker and passed to :meth:`MCS.simulate` as ``f``, or as the argument named
+            by a third element of the tuple.
+        seeds: A list of seeds passed to the constructor as `seed`, e.g. from :func:`seeds`.
+    Returns:
+        A list of tasks for :func:`sweep`.
+    """
+    groups = {"init": init or {}, "initialize": initialize or {}, "simulate": simulate or {}}
+    if rule is not None:
+        groups["rule"] = rule[1]
+    if seeds is not None:
+        groups["init"] = {**groups["init"], "seed": seeds}
+    keys = [(group, name) for group, values in groups.items() for name in values]
+    tasks = []
+    for values in itertools.product(*(groups[group][name] for group, name in keys)):
+        task = {group: {} for group in groups}
+        for (group, name), value in zip(keys, values):
+            task[group][name] = value
+        if rule is not None:
+            task["rule"] = (rule[0], task["rule"], *rule[2:])
+        tasks.append(task)
+    return tasks
+
+
+def seeds(seed: int, n: int) -> List[np.random.SeedSequence]:
+    """Returns `n` independent seeds spawned from `seed`, e.g. for the `seeds` of :func:`product`.
+
+    The spawned streams do not overlap, so models seeded with them are reproducible whichever thread or process
+    runs them.
+    """
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+def sample(n: int, seed: int = None, **kwargs) -> List[dict]:
+    """Returns `n` tasks drawn at random from the combinations of :func:`product`.
+
+    Args:
+        n: The number of tasks.
+        seed: The seed of the sampling.
+        **kwargs: Arguments of :func:`product`.
+    """
+    tasks = product(**kwargs)
+    rng = np.random.default_rng(seed)
+    return [tasks[i] for i in rng.choice(len(tasks), size=n, replace=n > len(tasks))]
+
+
+def run(model: Type[MCS], task: dict) -> MCS:
+    """Constructs, initializes and simulates a model according to a task."""
+    m = model(**task.get("init", {}))
+    m.initialize(**task.get("initialize", {}))
+    kwargs = dict(task.get("simulate", {}))
+    if "rule" in task:
+        name, params, *arg = task["rule"]
+        kwargs[arg[0] if arg else "f"] = getattr(m, name)(**params)
+    m.simulate(**kwargs)
+    return m
+
+
+def _worker(model, task, reducer, name, shape, dtype, index):
+    result = reducer(run(model, task))
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        np.ndarray((index + 1, *shape), dtype=dtype, buffer=block.buf)[index] = result
+    finally:
+        block.close()
+    return index
+
+
+def sweep(
+    model: Type[MCS],
+    tasks: List[dict],
+    *,
+    reducer: Callable = final_state,
+    max_workers: int = None,
+    progress: Callable = None,
+    cancel: threading.Event = None,
+) -> np.ma.MaskedArray:
+    """Runs the tasks of a parameter sweep over a process pool.
+
+    Each worker reduces its model to a summary, e.g. the final states or the time to synchronization, and writes it
+    into a shared memory block, so whole histories are never sent back. The first task runs in this process to
+    determine the shape of the summaries.
+
+    Args:
+        model: A subclass of :class:`MCS`.
+        tasks: A list of tasks, see :func:`product`.
+        reducer: A picklable function mapping a simulated model to an array-like summary.
+        max_workers: The number of processes.
+        progress: A function called with the numbers of finished and all tasks after each task.
+        cancel: An event which, once set, cancels the tasks not started yet.
+    Returns:
+        A `numpy.ma.MaskedArray` of the summaries, with the cancelled tasks masked.
+    """
+    first = np.asarray(reducer(run(model, tasks[0])))
+    shape, dtype = first.shape, first.dtype
+    results = np.ma.masked_all((len(tasks), *shape), dtype=dtype)
+    results[0] = first
+    done = 1
+    if progress is not None:
+        progress(done, len(tasks))
+    if len(tasks) == 1:
+        return results
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(tasks) * first.nbytes))
+    try:
+        out = np.ndarray((len(tasks), *shape), dtype=dtype, buffer=block.buf)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_worker, model, task, reducer, block.name, shape, dtype, i)
+                for i, task in enumerate(tasks)
+                if i > 0
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                i = future.result()
+                results[i] = out[i]
+                done += 1
+                if progress is not None:
+                    progress(done, len(tasks))
+                if cancel is not None and cancel.is_set():
+                    for f in futures:
+                        f.cancel()
+        del out
+    finally:
+        block.close()
+        block.unlink()
+    return results
@@ -0,0 +1,168 @@
+import concurrent.futures
+import multiprocessing.util
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+
+_make = None
+_attached = {}
+_kernels = {}
+
+
+def _init(make):
+    """Sets up a worker process, closing its shared memory when the pool shuts it down."""
+    global _make
+    _make = make
+    multiprocessing.util.Finalize(None, _detach, exitpriority=0)
+
+
+def _attach(names, shape, dtype):
+    """Returns the arrays of the shared memory blocks `names`, detaching the blocks of a previous grid first."""
+    if set(names) != set(_attached):
+        _detach()
+        for name in names:
+            block = shared_memory.SharedMemory(name=name)
+            _attached[name] = block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return [_attached[name][1] for name in names]
+
+
+def _detach():
+    """Closes the shared memory attached by this worker and drops the kernels of its strips."""
+    _kernels.clear()
+    while _attached:
+        _, (block, _) = _attached.popitem()
+        block.close()
+
+
+def _step_tile(names, shape, dtype, bounds, halo, axis):
+    config, out = _attach(names, shape, dtype)
+    r0, r1 = bounds
+    if bounds not in _kernels:
+        rows = np.arange(r0 - halo, r1 + halo) % shape[axis]
+        padded = list(shape)
+        padded[axis] = len(rows)
+        _kernels[bounds] = _make(), rows, np.empty(padded, dtype)
+    kernel, rows, buffer = _kernels[bounds]
+    index = (slice(None),) * axis
+    result = kernel(np.take(config, rows, axis=axis, out=buffer))
+    out[index + (slice(r0, r1),)] = result[index + (slice(halo, halo + r1 - r0),)]
+
+
+class Tiled:
+    """Domain-decomposed execution of a local state transition function.
+
+    The grid is split into strips of rows. Each strip is stepped with a halo of neighboring rows, wrapping around
+    the edges, and only its interior is kept, so the result equals stepping the whole periodic grid as long as the
+    stencil reaches no further than the halo. The strips are updated in parallel by a thread pool, relying on NumPy
+    releasing the GIL, or by a process pool stepping in place on a pair of shared memory blocks. Workers receive
+    only the bounds of their strip, and keep its kernel, row indices and halo buffer between steps.
+
+    The returned array is reused two calls later with threads. With processes, it is the input block of the next
+    call, so passing it back copies nothing, and it is overwritten if another array is passed instead. It is a view
+    of shared memory, so copy it to keep it after the shape of the grid changes or the pool is closed.
+
+    Use as a context manager, or call :meth:`close` to release the pool.
+
+    Attributes:
+        make: A function returning the state transition function, e.g. ``lambda: CA.life_like("B3/S23")``.
+            It is called once per strip, so kernels with internal buffers are never shared between workers.
+            It must be picklable for processes, e.g. a `functools.partial` of :meth:`PDE.turing`.
+        tiles: The number of strips.
+        halo: The number of halo rows on each side, at least the radius of the stencil.
+        axis: The axis of the rows, e.g. 1 for the ``"soa"`` layout of :class:`PDE`.
+        executor: ``"thread"`` or ``"process"``.
+    """
+
+    def __init__(
+        self,
+        make: Callable,
+        tiles: int,
+        halo: int = 1,
+        axis: int = 0,
+        executor: str = "thread",
+        max_workers: int = None,
+    ):
+        assert executor in ("thread", "process")
+        self.make = make
+        self.tiles = tiles
+        self.halo = halo
+        self.axis = axis
+        self.executor = executor
+        if executor == "thread":
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or tiles)
+        else:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers or tiles, initializer=_init, initargs=(make,)
+            )
+        self._kernels = [make() for _ in range(tiles)] if executor == "thread" else None
+        self._shape = self._dtype = None
+        self._blocks = []
+        self._parity = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shuts down the pool, whose workers close their shared memory, and releases it."""
+        self._pool.shutdown()
+        self._release()
+
+    def _release(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def _prepare(self, config):
+        """Splits the grid into strips and allocates the buffers for its shape."""
+        self._shape, self._dtype = config.shape, config.dtype
+        n, h = config.shape[self.axis], self.halo
+        bounds = np.linspace(0, n, self.tiles + 1).astype(int)
+        assert np.all(np.diff(bounds) >= h)
+        self._bounds = [(int(r0), int(r1)) for r0, r1 in zip(bounds[:-1], bounds[1:])]
+        index = (slice(None),) * self.axis
+        self._strips = [
+            (np.arange(r0 - h, r1 + h) % n, (index + (slice(r0, r1),), index + (slice(h, h + r1 - r0),)))
+            for r0, r1 in zip(bounds[:-1], bounds[1:])
+        ]
+        self._release()
+        if self.executor == "thread":
+            self._buffers = []
+            for rows, _ in self._strips:
+                shape = list(config.shape)
+                shape[self.axis] = len(rows)
+                self._buffers.append(np.empty(shape, config.dtype))
+            self._arrays = [np.empty_like(config), np.empty_like(config)]
+        else:
+            self._blocks = [shared_memory.SharedMemory(create=True, size=max(1, config.nbytes)) for _ in range(2)]
+            self._arrays = [np.ndarray(config.shape, config.dtype, buffer=block.buf) for block in self._blocks]
+
+    def _step_strip(self, i, config, out):
+        rows, core = self._strips[i]
+        padded = np.take(config, rows, axis=self.axis, out=self._buffers[i])
+        out[core[0]] = self._kernels[i](padded)[core[1]]
+
+    def __call__(self, config):
+        if config.shape != self._shape or config.dtype != self._dtype:
+            self._prepare(config)
+        parity = self._parity
+        self._parity ^= 1
+        out = self._arrays[parity]
+        if self.executor == "thread":
+            futures = [self._pool.submit(self._step_strip, i, config, out) for i in range(self.tiles)]
+        else:
+            source = self._arrays[1 - parity]
+            if config is not source:
+                source[...] = config
+            names = self._blocks[1 - parity].name, self._blocks[parity].name
+            futures = [
+                self._pool.submit(_step_tile, names, self._shape, self._dtype, bounds, self.halo, self.axis)
+                for bounds in self._bounds
+            ]
+        for future in futures:
+            future.result()
+        return out